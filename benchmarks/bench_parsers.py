@@ -0,0 +1,230 @@
+"""
+解析器吞吐量基准。
+
+在 Blender 之外用合成文件 (见 synthetic.py) 运行插件的解析器,
+按文件类型、布局和文件大小输出 MB/s 和元素/s (.mesh 为顶点,
+.anim 为帧, .skel 为骨骼)::
+
+    python benchmarks/bench_parsers.py --sizes tiny,small,medium -n 5
+    python benchmarks/bench_parsers.py --kinds mesh --layouts map --sizes large -j 8 --json map.json
+    python benchmarks/bench_parsers.py --kinds anim,skel --sizes tiny,small,medium,large
+
+每种情况先解析一次预热, 再取 n 次中最快的一次; 解析出的数量
+与生成的数量不一致时报错退出。地图不使用分块索引 (每次完整扫描头部)。
+"""
+
+import argparse
+import importlib
+import importlib.util
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+import synthetic
+
+# 常量定义
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC = os.path.join(ROOT, "src")
+PACKAGE = "pde_model_tools"
+MB = 1024 * 1024
+# 名称 -> (网格块数量, 每块顶点数量)
+MESH_SIZES = {
+    "tiny": (1, 100),
+    "small": (16, 1000),
+    "medium": (64, 10000),
+    "large": (256, 20000),
+}
+MESH_LAYOUTS = ("map", "prop", "character")
+# 名称 -> (顶点组数量, 每组帧数)
+ANIM_SIZES = {
+    "tiny": (1, 10),
+    "small": (32, 100),
+    "medium": (128, 2000),
+    "large": (256, 20000),
+}
+# 名称 -> 骨骼数量
+SKEL_SIZES = {
+    "tiny": 1,
+    "small": 64,
+    "medium": 2000,
+    "large": 200000,
+}
+KINDS = ("mesh", "anim", "skel")
+
+
+def import_package(name: str):
+    """按包名 pde_model_tools 导入 src 下的模块 (不需要安装插件)"""
+    if PACKAGE not in sys.modules:
+        spec = importlib.util.spec_from_file_location(
+            PACKAGE, os.path.join(SRC, "__init__.py"), submodule_search_locations=[SRC]
+        )
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[PACKAGE] = module
+        spec.loader.exec_module(module)
+    return importlib.import_module(f"{PACKAGE}.{name}")
+
+
+def best_time(function, repeat: int) -> float:
+    """预热一次后运行 repeat 次, 返回最短耗时 (秒)"""
+    function()
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_mesh(
+    directory: str, layout: str, size: str, repeat: int, workers: int
+) -> Dict[str, object]:
+    """生成一个 .mesh 文件并测量解析速度"""
+    loader = import_package("loader")
+
+    chunks, vertices = MESH_SIZES[size]
+    spec = synthetic.MeshSpec(
+        layout=layout, chunks=chunks, vertices=vertices, faces=vertices * 3 // 2
+    )
+    filepath = os.path.join(directory, f"{layout}-{size}.mesh")
+    expected = synthetic.write_mesh(filepath, spec)
+
+    _, meta, arrays = loader.parse_file(filepath, layout, use_index=False, workers=workers)
+    parsed = sum(len(arrays[f"{index}.positions"]) for index in range(len(meta)))
+    if len(meta) != expected["chunks"] or parsed != expected["vertices"]:
+        raise RuntimeError(
+            f"{filepath}: 解析出 {len(meta)} 个网格块 {parsed} 个顶点, "
+            f"应为 {expected['chunks']} 个网格块 {expected['vertices']} 个顶点"
+        )
+
+    seconds = best_time(
+        lambda: loader.parse_file(filepath, layout, use_index=False, workers=workers),
+        repeat,
+    )
+    return result("mesh", layout, size, expected["bytes"], expected["vertices"], seconds)
+
+
+def bench_anim(directory: str, size: str, repeat: int) -> Dict[str, object]:
+    """生成一个 .anim 文件并测量解析速度"""
+    loader = import_package("loader")
+
+    groups, frames = ANIM_SIZES[size]
+    spec = synthetic.AnimSpec(groups=groups, frames=frames)
+    filepath = os.path.join(directory, f"anim-{size}.anim")
+    expected = synthetic.write_anim(filepath, spec)
+
+    _, names, arrays = loader.parse_file(filepath)
+    parsed = sum(len(arrays[name]) for name in names)
+    if len(names) != expected["groups"] or parsed != expected["frames"]:
+        raise RuntimeError(
+            f"{filepath}: 解析出 {len(names)} 个顶点组 {parsed} 帧, "
+            f"应为 {expected['groups']} 个顶点组 {expected['frames']} 帧"
+        )
+
+    seconds = best_time(lambda: loader.parse_file(filepath), repeat)
+    return result("anim", "-", size, expected["bytes"], expected["frames"], seconds)
+
+
+def bench_skel(directory: str, size: str, repeat: int) -> Dict[str, object]:
+    """生成一个 .skel 文件并测量解析速度"""
+    loader = import_package("loader")
+
+    spec = synthetic.SkelSpec(bones=SKEL_SIZES[size])
+    filepath = os.path.join(directory, f"skel-{size}.skel")
+    expected = synthetic.write_skel(filepath, spec)
+
+    _, names, arrays = loader.parse_file(filepath)
+    if len(names) != expected["bones"] or len(arrays["transforms"]) != expected["bones"]:
+        raise RuntimeError(
+            f"{filepath}: 解析出 {len(names)} 个骨骼 {len(arrays['transforms'])} 个变换, "
+            f"应为 {expected['bones']} 个"
+        )
+
+    seconds = best_time(lambda: loader.parse_file(filepath), repeat)
+    return result("skel", "-", size, expected["bytes"], expected["bones"], seconds)
+
+
+def result(
+    kind: str, layout: str, size: str, nbytes: int, elements: int, seconds: float
+) -> Dict[str, object]:
+    return {
+        "kind": kind,
+        "layout": layout,
+        "size": size,
+        "bytes": nbytes,
+        "elements": elements,
+        "seconds": seconds,
+        "mb_per_s": nbytes / MB / seconds,
+        "elements_per_s": elements / seconds,
+    }
+
+
+def print_results(results: List[Dict[str, object]]) -> None:
+    print(
+        f"{'类型':<6}{'布局':<12}{'大小':<8}{'MB':>10}{'元素':>12}"
+        f"{'ms':>10}{'MB/s':>10}{'元素/s':>12}"
+    )
+    for r in results:
+        print(
+            f"{r['kind']:<8}{r['layout']:<14}{r['size']:<10}"
+            f"{r['bytes'] / MB:>10.2f}{r['elements']:>14}"
+            f"{r['seconds'] * 1000:>10.2f}{r['mb_per_s']:>10.1f}{r['elements_per_s']:>14,.0f}"
+        )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--kinds", default=",".join(KINDS), help="文件类型, 逗号分隔: mesh, anim, skel"
+    )
+    parser.add_argument(
+        "--layouts", default=",".join(MESH_LAYOUTS), help=".mesh 布局, 逗号分隔"
+    )
+    parser.add_argument(
+        "--sizes", default="tiny,small,medium",
+        help=f"文件大小, 逗号分隔: {', '.join(MESH_SIZES)}",
+    )
+    parser.add_argument("-n", "--repeat", type=int, default=5, help="每种情况的运行次数")
+    parser.add_argument("-j", "--workers", type=int, default=1, help="解码线程数")
+    parser.add_argument("--keep", help="保留生成的文件到该目录, 默认使用临时目录")
+    parser.add_argument("--json", help="同时把结果写成 JSON 文件")
+    args = parser.parse_args()
+
+    kinds = [name for name in args.kinds.split(",") if name]
+    layouts = [name for name in args.layouts.split(",") if name]
+    sizes = [name for name in args.sizes.split(",") if name]
+    for name in kinds:
+        if name not in KINDS:
+            parser.error(f"未知文件类型: {name}")
+    for name in layouts:
+        if name not in MESH_LAYOUTS:
+            parser.error(f"未知布局: {name}")
+    for name in sizes:
+        if name not in MESH_SIZES:
+            parser.error(f"未知大小: {name}")
+
+    with tempfile.TemporaryDirectory(prefix="pmt-bench-") as temp:
+        directory = args.keep or temp
+        results = []
+        if "mesh" in kinds:
+            results += [
+                bench_mesh(directory, layout, size, args.repeat, args.workers)
+                for layout in layouts
+                for size in sizes
+            ]
+        if "anim" in kinds:
+            results += [bench_anim(directory, size, args.repeat) for size in sizes]
+        if "skel" in kinds:
+            results += [bench_skel(directory, size, args.repeat) for size in sizes]
+
+    print_results(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
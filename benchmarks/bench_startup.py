@@ -0,0 +1,124 @@
+"""
+插件启动耗时基准。
+
+用普通 Python 运行时作为驱动, 多次启动 Blender (后台, 出厂设置),
+对比不加载插件和加载插件的启动耗时::
+
+    python benchmarks/bench_startup.py --blender "D:/Apps/Blender/blender.exe" -n 10
+
+在 Blender 内运行时 (由驱动调用), 测量导入和注册插件的耗时,
+并列出注册后已经加载的重模块 (应为空)。
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# 常量定义
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC = os.path.join(ROOT, "src")
+PACKAGE = "pde_model_tools"
+RESULT_PREFIX = "PMT_STARTUP "
+# 注册时不应加载的模块
+HEAVY_MODULES = (
+    "numpy",
+    "bmesh",
+    "mathutils.kdtree",
+    "multiprocessing.shared_memory",
+    "concurrent.futures.process",
+    f"{PACKAGE}.engine",
+    f"{PACKAGE}.loader",
+    f"{PACKAGE}.cache",
+    f"{PACKAGE}.geometry",
+)
+
+
+def measure_register() -> dict:
+    """在 Blender 内导入并注册插件, 返回耗时 (毫秒) 和已加载的重模块"""
+    preloaded = {name for name in HEAVY_MODULES if name in sys.modules}
+
+    start = time.perf_counter()
+    spec = importlib.util.spec_from_file_location(
+        PACKAGE, os.path.join(SRC, "__init__.py"), submodule_search_locations=[SRC]
+    )
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[PACKAGE] = module
+    spec.loader.exec_module(module)
+    imported = time.perf_counter()
+    module.register()
+    registered = time.perf_counter()
+    module.unregister()
+
+    return {
+        "import_ms": (imported - start) * 1000,
+        "register_ms": (registered - imported) * 1000,
+        "heavy_modules": sorted(
+            name for name in HEAVY_MODULES if name in sys.modules and name not in preloaded
+        ),
+    }
+
+
+def launch(blender: str, with_addon: bool) -> tuple:
+    """启动一次 Blender, 返回 (总耗时秒, 插件测量结果)"""
+    if with_addon:
+        expr = (
+            f"import sys, json; sys.path.insert(0, {os.path.dirname(__file__)!r}); "
+            "import bench_startup as b; "
+            f"print({RESULT_PREFIX!r} + json.dumps(b.measure_register()))"
+        )
+    else:
+        expr = "pass"
+
+    start = time.perf_counter()
+    output = subprocess.run(
+        [blender, "--background", "--factory-startup", "--python-expr", expr],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    elapsed = time.perf_counter() - start
+
+    for line in output.splitlines():
+        if line.startswith(RESULT_PREFIX):
+            return elapsed, json.loads(line[len(RESULT_PREFIX):])
+    return elapsed, None
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--blender", default="blender", help="Blender 可执行文件")
+    parser.add_argument("-n", "--repeat", type=int, default=5, help="每种情况启动次数")
+    args = parser.parse_args()
+
+    baseline = []
+    with_addon = []
+    results = []
+    for _ in range(args.repeat):
+        baseline.append(launch(args.blender, False)[0])
+        elapsed, result = launch(args.blender, True)
+        with_addon.append(elapsed)
+        results.append(result)
+
+    if not all(results):
+        print("没有读取到插件测量结果", file=sys.stderr)
+        return 1
+
+    base = statistics.median(baseline)
+    addon = statistics.median(with_addon)
+    print(f"Blender 启动 (无插件)   中位数 {base * 1000:8.1f} ms")
+    print(f"Blender 启动 (注册插件) 中位数 {addon * 1000:8.1f} ms  差值 {(addon - base) * 1000:+.1f} ms")
+    print(f"导入插件 中位数 {statistics.median(r['import_ms'] for r in results):8.2f} ms")
+    print(f"注册插件 中位数 {statistics.median(r['register_ms'] for r in results):8.2f} ms")
+
+    heavy = sorted({name for r in results for name in r["heavy_modules"]})
+    print(f"注册时加载的重模块: {', '.join(heavy) if heavy else '无'}")
+    return 1 if heavy else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,401 @@
+"""
+合成测试文件生成器。
+
+按插件解析器期望的布局写出 .mesh 文件, 内容为随机数据,
+用于基准测试和复现问题, 不依赖 Blender 和插件本身::
+
+    python benchmarks/synthetic.py mesh out/map.mesh --layout map --chunks 64 --vertices 10000
+    python benchmarks/synthetic.py anim out/walk.anim --groups 64 --frames 1000
+    python benchmarks/synthetic.py skel out/body.skel --bones 200
+
+.mesh 布局:
+- map: 0x18 字节包围盒, 网格块之间有 ColorMap 和无效数据, 需要扫描下一个头部
+- prop: 0x18 字节包围盒, 网格块首尾相接, ColorMap 和无效数据在最后
+- character: 开头为名称表, 网格块之间有 ColorMap 和无效数据
+
+网格块: 0x1D 字节头部 (0x0 网格数量, 0x8 顶点数量, 0x14 贴图索引,
+0x19 顶点字节数), 顶点块 (每个顶点 block_size 字节: 0x0 float32 位置,
+0x0C float16 法线, block_size - uv_offset 处 float16 UV),
+uint32 面块字节数, 面块 (每个三角面 12 字节, uint16 索引在 0x0, 0x4, 0x8)。
+
+.anim: 依次为顶点组 (uint32 名称长度, 名称, 8 字节特征 (前 4 字节为
+帧数), 每帧 28 字节: 位置 3f, 旋转 3f, 未知 1f), 之后可以是文件自己的
+名称 (uint32 长度, 名称) 和未知数据, 解析器在这里停止。
+
+.skel: 12 字节标记, 骨骼记录 (uint32 名称长度, ASCII 名称, uint32 层级),
+每个骨骼 28 字节变换 (头部坐标 3f, 尾部坐标 3f, 结束标记 1f)。
+第一个变换以 0 开始且第 28 个字节为 0x3F, 解析器以此判断名称部分结束。
+"""
+
+import argparse
+import os
+import struct
+import sys
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+# 常量定义
+HEADER_SIZE = 0x1D
+BOUNDS_SIZE = 0x18
+FACE_SIZE = 0xC
+MAX_VERTICES = 0x10000  # 面索引为 uint16
+COLORMAP_PATTERN = b"ColorMap"
+# 布局 -> UV 距顶点块末尾的偏移
+UV_OFFSETS = {"map": 0x10, "prop": 0x10, "character": 0x8}
+DEFAULT_BLOCK_SIZES = {"map": 0x34, "prop": 0x34, "character": 0x2C}
+# UV 不能与位置和法线重叠
+MIN_UV_START = 0x12
+
+ANIM_FRAME_FLOATS = 7
+# 特征的后 4 字节, 含义未知
+ANIM_FEATURE_TAIL = b"\x01\x00\x00\x00"
+# 插件限制顶点组名称长度
+MAX_GROUP_NAME = 63
+SKEL_MAGIC = b"\xFF\xFF\xFF\xFF\x00\x00\x00\x00\x00\x00\x00\x00"
+SKEL_TRANSFORM_FLOATS = 7
+# 结束标记 1.0 的最高字节为 0x3F
+SKEL_END_TAG = 1.0
+
+
+@dataclass
+class MeshSpec:
+    """合成 .mesh 文件的参数"""
+
+    layout: str = "map"
+    chunks: int = 8
+    vertices: int = 1000  # 每个网格块
+    faces: int = 1500  # 每个网格块
+    block_size: int = 0  # 0 表示使用布局的默认值
+    # 贴图路径模板, {index} 为网格块序号; 为空时不写 ColorMap
+    colormap: str = "textures/synthetic_{index}.dds"
+    garbage: int = 64  # 每个网格块后插入的无效数据字节数
+    seed: int = 0
+
+    def __post_init__(self):
+        if self.layout not in UV_OFFSETS:
+            raise ValueError(f"未知布局: {self.layout}")
+        if not self.block_size:
+            self.block_size = DEFAULT_BLOCK_SIZES[self.layout]
+        if self.block_size - UV_OFFSETS[self.layout] < MIN_UV_START:
+            raise ValueError(f"block_size 过小: {self.block_size:#x}")
+        if not 0 < self.vertices <= MAX_VERTICES:
+            raise ValueError(f"顶点数量应在 1 到 {MAX_VERTICES} 之间")
+        if self.chunks <= 0 or self.faces < 0 or self.garbage < 0:
+            raise ValueError("网格块数量、面数量和无效数据长度不能为负")
+
+
+def vertex_block(spec: MeshSpec, rng: np.random.Generator) -> np.ndarray:
+    """随机顶点块 (结构化数组, 每个元素 block_size 字节)"""
+    count = spec.vertices
+    layout = np.dtype(
+        {
+            "names": ["position", "normal", "uv"],
+            "formats": [("<f4", 3), ("<f2", 3), ("<f2", 2)],
+            "offsets": [0x0, 0x0C, spec.block_size - UV_OFFSETS[spec.layout]],
+            "itemsize": spec.block_size,
+        }
+    )
+    block = np.zeros(count, dtype=layout)
+    block["position"] = rng.uniform(-100, 100, (count, 3))
+    normals = rng.normal(size=(count, 3))
+    block["normal"] = normals / np.linalg.norm(normals, axis=1, keepdims=True)
+    block["uv"] = rng.random((count, 2))
+    return block
+
+
+def face_block(spec: MeshSpec, rng: np.random.Generator) -> np.ndarray:
+    """随机三角面块, 每行 6 个 uint16, 索引在 0, 2, 4 列"""
+    faces = np.zeros((spec.faces, FACE_SIZE // 2), dtype="<u2")
+    faces[:, 0::2] = rng.integers(0, spec.vertices, (spec.faces, 3))
+    return faces
+
+
+def chunk_header(spec: MeshSpec, rng: np.random.Generator) -> bytes:
+    """0x1D 字节网格头部"""
+    header = bytearray(HEADER_SIZE)
+    struct.pack_into("<III", header, 0x0, spec.chunks, 1, spec.vertices)
+    struct.pack_into("<I", header, 0x14, int(rng.integers(0, 0x100)))
+    struct.pack_into("<I", header, 0x19, spec.vertices * spec.block_size)
+    return bytes(header)
+
+
+def colormap_path(spec: MeshSpec, index: int) -> str:
+    """第 index 个网格块的贴图路径, 不写 ColorMap 时为空"""
+    return spec.colormap.format(index=index) if spec.colormap else ""
+
+
+def colormap_record(spec: MeshSpec, index: int) -> bytes:
+    """ColorMap 字符串: 标记, 1 字节路径长度, 3 字节填充, 路径"""
+    if not spec.colormap:
+        return b""
+    path = colormap_path(spec, index).encode("utf-8")
+    return COLORMAP_PATTERN + struct.pack("<B3x", len(path)) + path
+
+
+def garbage(spec: MeshSpec, rng: np.random.Generator) -> bytes:
+    """无效数据, 不含 0 字节, 不会被误认为网格头部"""
+    return rng.integers(1, 0x100, spec.garbage, dtype=np.uint8).tobytes()
+
+
+def generate_mesh(spec: MeshSpec, expected: Optional[List[Dict[str, Any]]] = None) -> bytes:
+    """生成 .mesh 文件内容
+
+    传入 expected 列表时, 按网格块顺序追加解析器应得到的 float32 位置、
+    法线、UV (V 已翻转)、面索引和写在该网格块后的贴图路径 (道具为空)。
+    """
+    rng = np.random.default_rng(spec.seed)
+    parts = []
+
+    if spec.layout == "character":
+        names = [f"part_{index}".encode("ascii") for index in range(spec.chunks)]
+        parts.append(struct.pack("<I", spec.chunks))
+        for name in names:
+            parts.append(struct.pack("<I", len(name)) + name)
+        parts.append(struct.pack("<I", spec.chunks))
+        parts.append(bytes(BOUNDS_SIZE * spec.chunks))
+    else:
+        parts.append(bytes(BOUNDS_SIZE))
+
+    for index in range(spec.chunks):
+        parts.append(chunk_header(spec, rng))
+        vertices = vertex_block(spec, rng)
+        faces = face_block(spec, rng)
+        parts.append(vertices.tobytes())
+        parts.append(struct.pack("<I", faces.nbytes) + faces.tobytes())
+        # 道具的网格块首尾相接
+        if spec.layout != "prop":
+            parts.append(colormap_record(spec, index))
+            parts.append(garbage(spec, rng))
+
+        if expected is not None:
+            uvs = vertices["uv"].astype(np.float32)
+            uvs[:, 1] = 1 - uvs[:, 1]
+            expected.append(
+                {
+                    "positions": vertices["position"].astype(np.float32),
+                    "normals": vertices["normal"].astype(np.float32),
+                    "uvs": uvs,
+                    "faces": faces[:, 0::2].astype(np.int32),
+                    "colormap": colormap_path(spec, index)
+                    if spec.layout != "prop"
+                    else "",
+                }
+            )
+
+    if spec.layout == "prop":
+        parts.append(garbage(spec, rng))
+        parts.extend(colormap_record(spec, index) for index in range(spec.chunks))
+
+    return b"".join(parts)
+
+
+def write_mesh(filepath: str, spec: MeshSpec) -> Dict[str, int]:
+    """写出 .mesh 文件, 返回文件字节数和预期的网格块、顶点、面数量"""
+    return _write(
+        filepath,
+        generate_mesh(spec),
+        chunks=spec.chunks,
+        vertices=spec.chunks * spec.vertices,
+        faces=spec.chunks * spec.faces,
+    )
+
+
+@dataclass
+class AnimSpec:
+    """合成 .anim 文件的参数"""
+
+    groups: int = 32
+    frames: int = 100  # 每个顶点组
+    # 在顶点组之后写出文件自己的名称和未知数据
+    trailer: bool = True
+    seed: int = 0
+
+    def __post_init__(self):
+        if self.groups <= 0 or self.frames <= 0:
+            raise ValueError("顶点组数量和帧数应大于 0")
+
+
+def group_name(index: int) -> str:
+    """合法的顶点组名称: 字母或下划线开头"""
+    return f"Bip01_Bone{index:04d}"[:MAX_GROUP_NAME]
+
+
+def generate_anim(
+    spec: AnimSpec,
+    file_name: str = "synthetic",
+    expected: Optional[Dict[str, np.ndarray]] = None,
+) -> bytes:
+    """生成 .anim 文件内容, file_name 为写在末尾的文件名称
+
+    传入 expected 字典时, 按顺序写入每个顶点组名称和 (帧数, 7) float32 帧数据。
+    """
+    rng = np.random.default_rng(spec.seed)
+    parts = []
+    for index in range(spec.groups):
+        name = group_name(index).encode("ascii")
+        frames = np.empty((spec.frames, ANIM_FRAME_FLOATS), dtype="<f4")
+        frames[:, 0:3] = rng.uniform(-10, 10, (spec.frames, 3))
+        frames[:, 3:6] = rng.uniform(-np.pi, np.pi, (spec.frames, 3))
+        frames[:, 6] = 1.0
+        parts.append(struct.pack("<I", len(name)) + name)
+        parts.append(struct.pack("<I", spec.frames) + ANIM_FEATURE_TAIL)
+        parts.append(frames.tobytes())
+        if expected is not None:
+            expected[name.decode("ascii")] = frames.astype(np.float32)
+
+    if spec.trailer:
+        name = file_name.encode("utf-8")
+        parts.append(struct.pack("<I", len(name)) + name)
+        parts.append(rng.integers(1, 0x100, 16, dtype=np.uint8).tobytes())
+
+    return b"".join(parts)
+
+
+def write_anim(filepath: str, spec: AnimSpec) -> Dict[str, int]:
+    """写出 .anim 文件, 返回文件字节数和预期的顶点组数量、总帧数"""
+    name = os.path.splitext(os.path.basename(filepath))[0]
+    return _write(
+        filepath,
+        generate_anim(spec, name),
+        groups=spec.groups,
+        frames=spec.groups * spec.frames,
+    )
+
+
+@dataclass
+class SkelSpec:
+    """合成 .skel 文件的参数"""
+
+    bones: int = 64
+    max_level: int = 8  # 最大层级 (根骨骼为 1, 其余骨骼至少为 2)
+    seed: int = 0
+
+    def __post_init__(self):
+        if self.bones <= 0 or self.max_level < 2:
+            raise ValueError("骨骼数量应大于 0, 最大层级至少为 2")
+
+
+def generate_skel(spec: SkelSpec, expected: Optional[Dict[str, Any]] = None) -> bytes:
+    """生成 .skel 文件内容, 骨骼按先序排列
+
+    传入 expected 字典时, 写入 names (骨骼名称), levels (层级) 和
+    transforms ((骨骼数, 7) float32 变换)。
+    """
+    rng = np.random.default_rng(spec.seed)
+    parts = [SKEL_MAGIC]
+    names, levels = [], []
+
+    level = 1
+    for index in range(spec.bones):
+        name = f"Bip01_Bone{index}".encode("ascii")
+        if index:
+            # 子骨骼或者回到某个祖先的兄弟
+            level = int(rng.integers(2, min(level + 1, spec.max_level) + 1))
+        parts.append(struct.pack("<I", len(name)) + name + struct.pack("<I", level))
+        names.append(name.decode("ascii"))
+        levels.append(level)
+
+    transforms = np.empty((spec.bones, SKEL_TRANSFORM_FLOATS), dtype="<f4")
+    transforms[:, 0:6] = rng.uniform(-1, 1, (spec.bones, 6))
+    # 根骨骼头部在原点
+    transforms[0, 0:3] = 0.0
+    transforms[:, 6] = SKEL_END_TAG
+    parts.append(transforms.tobytes())
+    if expected is not None:
+        expected.update(
+            names=names, levels=levels, transforms=transforms.astype(np.float32)
+        )
+
+    return b"".join(parts)
+
+
+def write_skel(filepath: str, spec: SkelSpec) -> Dict[str, int]:
+    """写出 .skel 文件, 返回文件字节数和预期的骨骼数量"""
+    return _write(filepath, generate_skel(spec), bones=spec.bones)
+
+
+def _write(filepath: str, data: bytes, **expected: int) -> Dict[str, int]:
+    os.makedirs(os.path.dirname(os.path.abspath(filepath)), exist_ok=True)
+    with open(filepath, "wb") as f:
+        f.write(data)
+    return {"bytes": len(data), **expected}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    mesh = commands.add_parser("mesh", help="生成 .mesh 文件")
+    mesh.add_argument("output", help="输出文件")
+    mesh.add_argument("--layout", choices=tuple(UV_OFFSETS), default="map")
+    mesh.add_argument("--chunks", type=int, default=MeshSpec.chunks, help="网格块数量")
+    mesh.add_argument(
+        "--vertices", type=int, default=MeshSpec.vertices, help="每个网格块的顶点数量"
+    )
+    mesh.add_argument(
+        "--faces", type=int, default=MeshSpec.faces, help="每个网格块的三角面数量"
+    )
+    mesh.add_argument(
+        "--block-size", type=lambda text: int(text, 0), default=0,
+        help="每个顶点的字节数, 默认按布局",
+    )
+    mesh.add_argument(
+        "--colormap", default=MeshSpec.colormap, help="贴图路径模板, 为空时不写 ColorMap"
+    )
+    mesh.add_argument(
+        "--garbage", type=int, default=MeshSpec.garbage, help="网格块之间的无效数据字节数"
+    )
+    mesh.add_argument("--seed", type=int, default=0)
+
+    anim = commands.add_parser("anim", help="生成 .anim 文件")
+    anim.add_argument("output", help="输出文件")
+    anim.add_argument("--groups", type=int, default=AnimSpec.groups, help="顶点组数量")
+    anim.add_argument(
+        "--frames", type=int, default=AnimSpec.frames, help="每个顶点组的帧数"
+    )
+    anim.add_argument(
+        "--no-trailer", action="store_true", help="不在末尾写出文件名称和未知数据"
+    )
+    anim.add_argument("--seed", type=int, default=0)
+
+    skel = commands.add_parser("skel", help="生成 .skel 文件")
+    skel.add_argument("output", help="输出文件")
+    skel.add_argument("--bones", type=int, default=SkelSpec.bones, help="骨骼数量")
+    skel.add_argument(
+        "--max-level", type=int, default=SkelSpec.max_level, help="最大层级"
+    )
+    skel.add_argument("--seed", type=int, default=0)
+
+    args = parser.parse_args()
+    if args.command == "mesh":
+        spec = MeshSpec(
+            layout=args.layout,
+            chunks=args.chunks,
+            vertices=args.vertices,
+            faces=args.faces,
+            block_size=args.block_size,
+            colormap=args.colormap,
+            garbage=args.garbage,
+            seed=args.seed,
+        )
+        stats = write_mesh(args.output, spec)
+    elif args.command == "anim":
+        spec = AnimSpec(
+            groups=args.groups,
+            frames=args.frames,
+            trailer=not args.no_trailer,
+            seed=args.seed,
+        )
+        stats = write_anim(args.output, spec)
+    else:
+        spec = SkelSpec(bones=args.bones, max_level=args.max_level, seed=args.seed)
+        stats = write_skel(args.output, spec)
+
+    print(f"{args.output}: " + ", ".join(f"{key} {value}" for key, value in stats.items()))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,22 +1,35 @@
 # __init__.py
-import bpy
-
-from . import ui
-from .anim.operator import ImportAnimClass
-from .mesh_map.operator import ImportMeshMapClass
-from .mesh_prop.operator import ImportMeshPropClass
-from .mesh_cw.operator import ImportMeshCWClass
-from .skel.operator import ImportSkelClass
-
-# 类表
-classes = (
-    ui.ImportPanel,
-    ImportMeshPropClass,
-    ImportMeshMapClass,
-    ImportMeshCWClass,
-    ImportAnimClass,
-    ImportSkelClass,
-)
+import sys
+
+from . import log
+
+try:
+    import bpy
+except ImportError:  # 在 Blender 之外只使用 engine 等解析模块
+    bpy = None
+
+if bpy is not None:
+    from . import preferences, ui
+    from .anim.operator import ImportAnimClass
+    from .mesh_map.operator import ImportMeshMapClass
+    from .mesh_prop.operator import ImportMeshPropClass
+    from .mesh_cw.operator import ImportMeshCWClass
+    from .skel.operator import ImportSkelClass
+    from .batch.operator import ImportBatchClass
+
+    # 类表
+    classes = (
+        preferences.PMTPreferences,
+        preferences.ClearCacheClass,
+        preferences.DumpLogClass,
+        ui.ImportPanel,
+        ImportMeshPropClass,
+        ImportMeshMapClass,
+        ImportMeshCWClass,
+        ImportAnimClass,
+        ImportSkelClass,
+        ImportBatchClass,
+    )
 
 
 # 注册和注销函数
@@ -24,9 +37,17 @@ def register():
     """注册类"""
     for cls in classes:
         bpy.utils.register_class(cls)
+    # 按已保存的设置配置日志
+    preferences.apply_logging()
 
 
 def unregister():
     """注销类"""
     for cls in reversed(classes):
         bpy.utils.unregister_class(cls)
+    # 释放内存缓存 (只在已加载时)
+    cache = sys.modules.get(f"{__package__}.cache")
+    if cache is not None:
+        cache.memory_cache.clear()
+    # 恢复默认日志级别并移除环形缓冲
+    log.configure()
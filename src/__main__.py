@@ -0,0 +1,7 @@
+# __main__.py
+import sys
+
+from .convert import main
+
+if __name__ == "__main__":
+    sys.exit(main())
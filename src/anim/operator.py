@@ -1,15 +1,68 @@
 # anim\operator.py
 import os
-import re
-import struct
 
-import bmesh
 import bpy
-from mathutils import Quaternion
 
+from .. import preferences
 from ..log import log
 
 
+def fill_fcurves(action, data_path, values, group_name):
+    """为 data_path 的每个分量创建 F-Curve, 从 (帧数, 分量数) 数组批量写入关键帧"""
+    import numpy as np
+
+    values = np.asarray(values, dtype=np.float32)
+    frame_count = len(values)
+
+    # 关键帧坐标 (帧, 值) 交错排列, 帧号从 0 开始
+    co = np.empty((frame_count, 2), dtype=np.float32)
+    co[:, 0] = np.arange(frame_count, dtype=np.float32)
+
+    for index in range(values.shape[1]):
+        fcurve = action.fcurves.new(data_path, index=index, action_group=group_name)
+        fcurve.keyframe_points.add(frame_count)
+        co[:, 1] = values[:, index]
+        fcurve.keyframe_points.foreach_set("co", co.ravel())
+        # 重新计算控制柄
+        fcurve.update()
+
+
+def create_proxy_mesh(name):
+    """创建所有顶点组共用的代理立方体网格"""
+    import bmesh
+
+    mesh = bpy.data.meshes.new(name=name)
+    bm = bmesh.new()
+    # 设置尺寸为 0.1
+    bmesh.ops.create_cube(bm, size=0.1)
+    bm.to_mesh(mesh)
+    bm.free()
+    mesh.update()
+    return mesh
+
+
+def create_group_objects(context, vertex_groups, name):
+    """为每个顶点组创建一个带动作的物体"""
+    # 所有顶点组共用一个代理立方体网格
+    mesh = create_proxy_mesh(name)
+
+    collection_objects = context.collection.objects
+    for group_name, frames in vertex_groups.items():
+        # 创建物体并添加到场景中 (不切换模式, 不调用 bpy.ops)
+        obj = bpy.data.objects.new(name=group_name, object_data=mesh)
+        collection_objects.link(obj)
+
+        # 直接创建动作和 F-Curve, 批量写入 location rotation 关键帧
+        action = bpy.data.actions.new(name=group_name)
+        fill_fcurves(action, "location", frames[:, 0:3], group_name)
+        # 旋转数据按欧拉角写入
+        fill_fcurves(action, "rotation_euler", frames[:, 3:6], group_name)
+
+        obj.rotation_mode = "XYZ"
+        obj.animation_data_create()
+        obj.animation_data.action = action
+
+
 # 顶义操作类
 class ImportAnimClass(bpy.types.Operator):
     """Import an game .anim file"""
@@ -26,6 +79,12 @@ class ImportAnimClass(bpy.types.Operator):
     # 文件扩展名过滤
     filename_ext = ".anim"
     filter_glob: bpy.props.StringProperty(default="*.anim", options={"HIDDEN"})  # type: ignore
+    # 导入到当前选中的骨架
+    use_armature: bpy.props.BoolProperty(
+        name="导入到骨架",
+        description="将动画写入当前选中骨架的一个动作, 按骨骼名称匹配顶点组",
+        default=False,
+    )  # type: ignore
 
     # 顶义invoke方法来显示文件选择对话框
     def invoke(self, context, event):
@@ -48,246 +107,98 @@ class ImportAnimClass(bpy.types.Operator):
             self.report({"ERROR"}, "文件不存在，请检查路径是否正确")
             return {"CANCELLED"}
 
-        # 读取文件
-        with open(file_path, "rb") as file:
-            data = file.read()
-
         # 从文件路径中提取文件名（不包括扩展名）
         file_name = os.path.splitext(os.path.basename(file_path))[0]
 
-        # 解析并获得帧数据
-        vertex_groups = self.parse_anim_file(data, file_name)
+        # 目标骨架
+        armature_obj = context.active_object
+        if self.use_armature and (
+            armature_obj is None or armature_obj.type != "ARMATURE"
+        ):
+            self.report({"ERROR"}, "请先选中一个骨架")
+            return {"CANCELLED"}
+
+        from .. import loader
+        from ..profiler import Profiler
+
+        profile = Profiler(file_name)
+
+        # 解析并获得帧数据 (内存映射读取或读取缓存)
+        _, _, vertex_groups = loader.load_file(
+            file_path,
+            cache=preferences.disk_cache(),
+            memory=preferences.memory_cache(),
+            profile=profile,
+        )
+        if not vertex_groups:
+            self.report({"ERROR"}, f"{file_name} 没有读取到动画数据")
+            return {"CANCELLED"}
+
+        # 导入到骨架时先匹配骨骼, 没有匹配时不修改场景和骨架
+        if self.use_armature:
+            from .utils import match_bones
+
+            bone_matches = match_bones(vertex_groups, armature_obj.pose.bones.keys())
+            if not bone_matches:
+                self.report(
+                    {"ERROR"}, f"{file_name} 没有与骨架 {armature_obj.name} 匹配的骨骼"
+                )
+                return {"CANCELLED"}
 
         # 获取总帧数
-        total_frames = max(len(group_data) for group_data in vertex_groups.values())
+        total_frames = max(len(frames) for frames in vertex_groups.values())
         log.debug("!!!!!!!!!!! 总帧数: %s", total_frames)
 
         # 设置Blender场景的帧数
         bpy.context.scene.frame_start = 1
         bpy.context.scene.frame_end = total_frames
 
+        frame_count = sum(len(frames) for frames in vertex_groups.values())
+        if self.use_armature:
+            with profile.stage("keyframes", items=frame_count):
+                result = self.import_to_armature(
+                    armature_obj, vertex_groups, bone_matches, file_name
+                )
+            preferences.report_profile(self, profile)
+            return result
+
         # 创建动画
-        for group_name, group_data in vertex_groups.items():
-            # 创建一个新的立方体网格
-            mesh = bpy.data.meshes.new(name=group_name)
-            # 创建一个新的立方体物体
-            obj = bpy.data.objects.new(name=group_name, object_data=mesh)
-            # 将物体添加到场景中
-            context.collection.objects.link(obj)
-
-            # 设置为活动物体
-            bpy.context.view_layer.objects.active = obj
-            # 保存当前模式
-            current_mode = bpy.context.object.mode
-            # 确保处于物体模式
-            bpy.ops.object.mode_set(mode="OBJECT")
-
-            # 添加立方体数据到网格
-            bm = bmesh.new()
-            # 设置尺寸为 0.1
-            bmesh.ops.create_cube(bm, size=0.1)
-            bm.to_mesh(mesh)
-            bm.free()
-
-            # 恢复之前的模式
-            bpy.ops.object.mode_set(mode=current_mode)
-            # 更新网格数据
-            mesh.update()
-
-            # 设置关键帧 location rotation
-            for frame, transform in enumerate(group_data):
-                # 设置位置关键帧
-                obj.location = transform["location"]
-                obj.keyframe_insert(data_path="location", frame=frame)
-
-                # 设置旋转关键帧(欧拉角)
-                # 假设旋转数据是以度为单位的欧拉角，需要转换为弧度
-                obj.rotation_euler = transform["rotation"]
-                obj.keyframe_insert(data_path="rotation_euler", frame=frame)
+        with profile.stage("keyframes", items=frame_count):
+            create_group_objects(context, vertex_groups, file_name)
 
         self.report({"INFO"}, f"{file_name} 动画文件加载成功")
+        preferences.report_profile(self, profile)
         return {"FINISHED"}
 
-    # 解析并获得帧数据
-    def parse_anim_file(self, data, file_name):
-        log.debug("开始处理 %s", file_name)
-
-        # 所有顶点组信息
-        all_group = []
-        # 当前顶点组数据结束的地址
-        group_eoffset = 0
-        # 第一个特征
-        frist_feature = 0
-        # 当前文件大小，用作结束位置
-        file_size = len(data)
-        # 可能的结束位置
-        # 有些文件中会出现自己文件的名字，右面的数据暂时是未知的
-        # 所以要找到他然后设置正确的结束位置
-        possible_end_offset = data.find(file_name.encode("utf-8"), 0)
-        if possible_end_offset != -1:
-            # 跳到名字大小前
-            file_size = possible_end_offset - 4
-
-        # 查找顶点组
-        log.debug("开始 查找顶点组")
-        while True:
-            # 文件分析 https://www.cnblogs.com/letleon/p/18511408
-            try:
-                # 获取 顶点组名称大小
-                group_name_length = struct.unpack(
-                    "I", data[group_eoffset: group_eoffset + 4]
-                )[0]
-                # 检查 长度是否超长
-                if group_name_length > 63:
-                    log.debug(
-                        "!名称长度: %s 超过了Blender的限制 63个字符 %s", group_name_length
-                    )
-                    break
-                log.debug("顶点组名称大小: %s", group_name_length)
-
-                # 获取 顶点组名字
-                group_name = data[
-                             group_eoffset + 4: group_eoffset + 4 + group_name_length
-                             ].decode("utf-8")
-                # 检查 名称是否合法
-                if not self.is_valid_group_name(group_name):
-                    log.debug("!名称不合法: %s", group_name)
-                    break
-                log.debug("顶点组名字:%s", group_name)
-
-                # 获取 顶点组帧数量,也就知道了当前顶点组数据结束位置
-                frames_number = struct.unpack(
-                    "I",
-                    data[
-                    group_eoffset
-                    + 4
-                    + group_name_length: group_eoffset
-                                         + 4
-                                         + group_name_length
-                                         + 4
-                    ],
-                )[0]
-                if frames_number == 0:
-                    log.debug("!顶点组帧数量为空: %s", frames_number)
-                    break
-                log.debug("顶点组帧数量: %s", frames_number)
-
-                # 获取 特征 8字节
-                this_feature = data[
-                               group_eoffset
-                               + 4
-                               + group_name_length: group_eoffset
-                                                    + 4
-                                                    + group_name_length
-                                                    + 8
-                               ]  # 特征是8个字节
-                # 判断 是否和第一个特征一样
-                if frist_feature == 0:
-                    if this_feature == 0:
-                        log.debug("!特征不能为0: %s", this_feature.hex())
-                        break
-                    frist_feature = this_feature
-                elif this_feature != this_feature:
-                    log.debug("!特征不对: %s", this_feature.hex())
-                    break
-                log.debug("特征: %s", this_feature.hex())
-
-                # 计算 当前顶点组数据开始的地址
-                this_group_soffset = group_eoffset + 4 + group_name_length + 8
-                log.debug("当前顶点组数据开始的地址: %s", this_group_soffset)
-
-                # 计算 顶点组数据结束位置
-                group_eoffset = (
-                        frames_number * 0x1C + group_eoffset + 4 + group_name_length + 8
-                )
-                if group_eoffset > file_size:
-                    log.debug("!顶点组数据结束位置越界: %s", group_eoffset)
-                    break
-                log.debug("顶点组数据结束位置: %s", group_eoffset)
-
-                # 写入all_group
-                log.debug("!写入all_group")
-                # 添加当前顶点组
-                all_group.append(
-                    {
-                        "name": group_name,
-                        "soffset": this_group_soffset,
-                        "eoffset": group_eoffset,
-                    }
-                )
-
-                # 正常退出
-                if group_eoffset == file_size:
-                    log.debug("!正常退出 查找到尾部")
-                    break
-            except NameError:
-                log.debug("!数据读取错误,查找顶点组结束")
-                break
-
-        log.debug("完成 查找到: %s 个顶点组", len(all_group))
-
-        # 顶点组帧数据
-        vertex_groups = {}
-        # 获取 所有顶点组帧数据
-        for now_group in all_group:
-            # 名称
-            group_name = now_group["name"]
-            log.debug("名称: %s", group_name)
-
-            # 添加到顶点组帧数据
-            if group_name not in vertex_groups:
-                vertex_groups[group_name] = []
-
-            # 当前顶点组数据 开始地址
-            soffset = now_group["soffset"]
-            # 当前顶点组数据 结束地址
-            eoffset = now_group["eoffset"]
-            # log.debug("soffset: %s eoffset: %s",soffset,eoffset)
-            # 获取顶点组帧数据
-            while soffset < eoffset:
-                # 检查剩余数据是否足够
-                if eoffset - soffset < 28:
-                    log.debug("!数据不足28字节")
-                    # 如果不足，则退出循环
-                    break
-                # 读取28字节的数据块
-                frame_data = data[soffset: soffset + 28]
-                # 方向
-                location = struct.unpack("3f", frame_data[0:12])
-                # 四元数 -> 后面会转换成 欧拉角
-                rotation = struct.unpack("3f", frame_data[12:24])
-                # 添加到 vertex_groups
-                vertex_groups[group_name].append(
-                    {"location": location, "rotation": rotation}
-                )
-                # 移动到下一帧
-                soffset += 28
-
-        log.debug("完成 读取到: %s 个顶点组帧数据", len(vertex_groups))
-        # 返回顶点组帧数据
-        return vertex_groups
+    # 将所有顶点组写入骨架的一个动作
+    def import_to_armature(self, armature_obj, vertex_groups, bone_matches, file_name):
+        pose_bones = armature_obj.pose.bones
+
+        action = bpy.data.actions.new(name=file_name)
+        for group_name, bone_name in bone_matches.items():
+            frames = vertex_groups[group_name]
+            # 旋转数据按欧拉角写入
+            pose_bones[bone_name].rotation_mode = "XYZ"
+            data_path = f'pose.bones["{bpy.utils.escape_identifier(bone_name)}"]'
+            fill_fcurves(action, f"{data_path}.location", frames[:, 0:3], bone_name)
+            fill_fcurves(
+                action, f"{data_path}.rotation_euler", frames[:, 3:6], bone_name
+            )
+
+        if armature_obj.animation_data is None:
+            armature_obj.animation_data_create()
+        armature_obj.animation_data.action = action
+
+        self.report(
+            {"INFO"},
+            f"{file_name} 动画文件加载成功: {len(bone_matches)}/{len(vertex_groups)} 个骨骼",
+        )
+        return {"FINISHED"}
 
     # 将四元数转换为欧拉角
     def quat_to_eul(self, quat):
+        from mathutils import Quaternion
+
         quat_obj = Quaternion(quat)
         euler_obj = quat_obj.to_euler("XYZ")
         return euler_obj
-
-    # 检查名称是否合法
-    def is_valid_group_name(self, now_group_name):
-        # 检查是否为空
-        if not now_group_name:
-            log.debug("!名称为空。%s", format(now_group_name))
-            return False
-
-        # 检查是否为字符串
-        if not isinstance(now_group_name, str):
-            log.debug("!不是字符串 %s", format(now_group_name))
-            return False
-
-        # 使用正则表达式匹配只包含a-z, A-Z, 且不以数字开头，包含0-9, _的字符串
-        if re.match("^[a-zA-Z_][a-zA-Z0-9_]*$", now_group_name):
-            return True
-        else:
-            log.debug("包含非法字符或以数字开头! %s".format(now_group_name))
-            return False
@@ -1,2 +1,232 @@
-
 # anim\utils.py
+import re
+import struct
+
+import numpy as np
+
+from .. import tools
+from ..log import log, tracing
+
+# 每帧数据大小
+FRAME_SIZE = 0x1C
+FRAME_FLOATS = FRAME_SIZE // 4
+
+
+# 解析并获得帧数据
+def parse_anim_file(data, file_name):
+    log.debug("开始处理 %s", file_name)
+    # 调试日志关闭时循环中只做布尔判断
+    trace = tracing()
+
+    # 所有顶点组信息
+    all_group = []
+    # 当前顶点组数据结束的地址
+    group_eoffset = 0
+    # 第一个特征
+    frist_feature = 0
+    # 当前文件大小，用作结束位置
+    file_size = len(data)
+    # 可能的结束位置
+    # 有些文件中会出现自己文件的名字，右面的数据暂时是未知的
+    # 所以要找到他然后设置正确的结束位置
+    possible_end_offset = tools.find_bytes(data, file_name.encode("utf-8"))
+    if possible_end_offset != -1:
+        # 跳到名字大小前
+        file_size = possible_end_offset - 4
+
+    # 查找顶点组
+    log.debug("开始 查找顶点组")
+    while True:
+        # 文件分析 https://www.cnblogs.com/letleon/p/18511408
+        try:
+            # 获取 顶点组名称大小
+            group_name_length = struct.unpack(
+                "I", data[group_eoffset: group_eoffset + 4]
+            )[0]
+            # 检查 长度是否超长
+            if group_name_length > 63:
+                log.debug("!名称长度: %s 超过了Blender的限制 63个字符", group_name_length)
+                break
+            if trace:
+                log.debug("顶点组名称大小: %s", group_name_length)
+
+            # 获取 顶点组名字
+            group_name = bytes(
+                data[group_eoffset + 4: group_eoffset + 4 + group_name_length]
+            ).decode("utf-8")
+            # 检查 名称是否合法
+            if not is_valid_group_name(group_name):
+                log.debug("!名称不合法: %s", group_name)
+                break
+            if trace:
+                log.debug("顶点组名字:%s", group_name)
+
+            # 获取 顶点组帧数量,也就知道了当前顶点组数据结束位置
+            frames_number = struct.unpack(
+                "I",
+                data[
+                group_eoffset
+                + 4
+                + group_name_length: group_eoffset
+                                     + 4
+                                     + group_name_length
+                                     + 4
+                ],
+            )[0]
+            if frames_number == 0:
+                log.debug("!顶点组帧数量为空: %s", frames_number)
+                break
+            if trace:
+                log.debug("顶点组帧数量: %s", frames_number)
+
+            # 获取 特征 8字节
+            this_feature = data[
+                           group_eoffset
+                           + 4
+                           + group_name_length: group_eoffset
+                                                + 4
+                                                + group_name_length
+                                                + 8
+                           ]  # 特征是8个字节
+            # 判断 是否和第一个特征一样
+            if frist_feature == 0:
+                if this_feature == 0:
+                    log.debug("!特征不能为0: %s", this_feature.hex())
+                    break
+                frist_feature = this_feature
+            elif this_feature != this_feature:
+                log.debug("!特征不对: %s", this_feature.hex())
+                break
+            if trace:
+                log.debug("特征: %s", this_feature.hex())
+
+            # 计算 当前顶点组数据开始的地址
+            this_group_soffset = group_eoffset + 4 + group_name_length + 8
+            if trace:
+                log.debug("当前顶点组数据开始的地址: %s", this_group_soffset)
+
+            # 计算 顶点组数据结束位置
+            group_eoffset = (
+                    frames_number * FRAME_SIZE + group_eoffset + 4 + group_name_length + 8
+            )
+            if group_eoffset > file_size:
+                log.debug("!顶点组数据结束位置越界: %s", group_eoffset)
+                break
+            if trace:
+                log.debug("顶点组数据结束位置: %s", group_eoffset)
+
+            # 写入all_group
+            if trace:
+                log.debug("!写入all_group")
+            # 添加当前顶点组
+            all_group.append(
+                {
+                    "name": group_name,
+                    "soffset": this_group_soffset,
+                    "eoffset": group_eoffset,
+                }
+            )
+
+            # 正常退出
+            if group_eoffset == file_size:
+                log.debug("!正常退出 查找到尾部")
+                break
+        except NameError:
+            log.debug("!数据读取错误,查找顶点组结束")
+            break
+
+    log.debug("完成 查找到: %s 个顶点组", len(all_group))
+
+    # 顶点组帧数据 {名称: (帧数, 7) float32 数组}
+    # 每帧 28 字节: 位置 3f, 旋转 3f, 未知 1f
+    vertex_groups = {}
+    # 获取 所有顶点组帧数据
+    for now_group in all_group:
+        # 名称
+        group_name = now_group["name"]
+        if trace:
+            log.debug("名称: %s", group_name)
+
+        # 当前顶点组数据 开始地址
+        soffset = now_group["soffset"]
+        # 当前顶点组数据 结束地址
+        eoffset = now_group["eoffset"]
+        # 不足 28 字节的尾部数据被忽略
+        frames_number = (eoffset - soffset) // FRAME_SIZE
+
+        # 直接查看整段帧数据, 复制一次以脱离文件缓冲区
+        frames = np.ndarray(
+            (frames_number, FRAME_FLOATS), dtype="<f4", buffer=data, offset=soffset
+        ).copy()
+
+        # 同名顶点组的帧数据依次拼接
+        if group_name in vertex_groups:
+            frames = np.concatenate((vertex_groups[group_name], frames))
+        vertex_groups[group_name] = frames
+
+    log.debug("完成 读取到: %s 个顶点组帧数据", len(vertex_groups))
+    # 返回顶点组帧数据
+    return vertex_groups
+
+
+# 检查名称是否合法
+def is_valid_group_name(now_group_name):
+    # 检查是否为空
+    if not now_group_name:
+        log.debug("!名称为空。%s", now_group_name)
+        return False
+
+    # 检查是否为字符串
+    if not isinstance(now_group_name, str):
+        log.debug("!不是字符串 %s", now_group_name)
+        return False
+
+    # 使用正则表达式匹配只包含a-z, A-Z, 且不以数字开头，包含0-9, _的字符串
+    if re.match("^[a-zA-Z_][a-zA-Z0-9_]*$", now_group_name):
+        return True
+    else:
+        log.debug("包含非法字符或以数字开头! %s", now_group_name)
+        return False
+
+
+def build_bone_map(bone_names):
+    """骨骼名称查找表: 精确名称表和小写名称表 (同名时取第一个骨骼)"""
+    exact = {}
+    folded = {}
+    for bone_name in bone_names:
+        exact.setdefault(bone_name, bone_name)
+        folded.setdefault(bone_name.lower(), bone_name)
+    return exact, folded
+
+
+def match_bones(group_names, bone_names):
+    """顶点组名称 -> 骨骼名称, 先精确匹配, 再忽略大小写匹配
+
+    每个骨骼只对应一个顶点组: 精确匹配优先, 其余按顶点组顺序取第一个,
+    对应到已使用骨骼的顶点组被跳过 (一个骨骼的 F-Curve 只能创建一次)。
+    """
+    exact, folded = build_bone_map(bone_names)
+    group_names = list(group_names)
+
+    matches = {}
+    used = set()
+    for group_name in group_names:
+        bone_name = exact.get(group_name)
+        if bone_name is not None and bone_name not in used:
+            matches[group_name] = bone_name
+            used.add(bone_name)
+
+    for group_name in group_names:
+        if group_name in matches:
+            continue
+        bone_name = exact.get(group_name) or folded.get(group_name.lower())
+        if bone_name is None:
+            log.debug("!没有找到骨骼: %s", group_name)
+        elif bone_name in used:
+            log.warning("!顶点组 %s 对应的骨骼 %s 已有动画, 跳过", group_name, bone_name)
+        else:
+            matches[group_name] = bone_name
+            used.add(bone_name)
+
+    # 保持顶点组顺序
+    return {name: matches[name] for name in group_names if name in matches}
@@ -0,0 +1,35 @@
+"""
+batch.bootstrap
+~~~~~~~~~~~~~~~
+
+批量导入子进程的初始化脚本, 由 runpy.run_path 执行, 不作为模块导入。
+
+子进程中没有 Blender 登记的扩展包 (例如 bl_ext.user_default),
+这里按主进程传入的包名和搜索路径在 sys.modules 中登记插件包及其上级包,
+进程池的任务和结果就能按主进程中的模块名序列化, 不需要修改 sys.path。
+
+全局变量 PACKAGES 由 init_globals 传入: [(包名, 搜索路径, __init__.py 路径)],
+上级包在前; __init__.py 路径为空的包登记为命名空间包, 不执行任何代码。
+"""
+
+import importlib.machinery
+import importlib.util
+import sys
+
+for name, paths, init_file in PACKAGES:  # noqa: F821
+    if name in sys.modules:
+        continue
+    if init_file:
+        spec = importlib.util.spec_from_file_location(
+            name, init_file, submodule_search_locations=paths
+        )
+    else:
+        spec = importlib.machinery.ModuleSpec(name, None, is_package=True)
+        spec.submodule_search_locations = list(paths)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    parent, _, child = name.rpartition(".")
+    if parent:
+        setattr(sys.modules[parent], child, module)
+    if spec.loader is not None:
+        spec.loader.exec_module(module)
@@ -0,0 +1,179 @@
+"""
+batch.operator
+~~~~~~~~~~~~~~
+
+批量导入文件夹或多选的 .mesh / .anim / .skel 文件。
+
+文件在进程池中并行解析, 解码后的数组通过共享内存传回,
+主线程只负责创建 Blender 数据块。
+"""
+
+import importlib
+import os
+from typing import List, Set
+
+import bpy
+from bpy.props import (
+    BoolProperty,
+    CollectionProperty,
+    EnumProperty,
+    IntProperty,
+    StringProperty,
+)
+from bpy.types import Operator, OperatorFileListElement
+from bpy_extras.io_utils import ImportHelper
+
+from .. import preferences
+from ..anim.operator import create_group_objects
+from ..log import log, trace_exc
+from ..mesh_map.operator import MeshImporter
+from ..skel.operator import create_armature
+
+
+def worker_module():
+    """导入 batch.utils (首次批量导入时)
+
+    子进程按同一个包名导入, 见 batch.bootstrap。
+    """
+    return importlib.import_module(".utils", __package__)
+
+
+class ImportBatchClass(Operator, ImportHelper):
+    """批量导入文件夹或多个文件"""
+
+    bl_idname = "import.pde_batch"
+    bl_label = "批量导入"
+    bl_options = {"REGISTER", "UNDO"}
+
+    filter_glob: StringProperty(
+        default="*.mesh;*.anim;*.skel", options={"HIDDEN"}
+    )  # type: ignore
+    files: CollectionProperty(
+        type=OperatorFileListElement, options={"HIDDEN", "SKIP_SAVE"}
+    )  # type: ignore
+    directory: StringProperty(subtype="DIR_PATH")  # type: ignore
+    mesh_layout: EnumProperty(
+        name=".mesh 类型",
+        items=(
+            ("auto", "自动 / Auto", "按文件内容推断"),
+            ("prop", "道具 / Prop", ""),
+            ("map", "地图 / Map", ""),
+            ("character", "人物&武器 / Character&Weapon", ""),
+        ),
+        default="auto",
+    )  # type: ignore
+    use_index: BoolProperty(
+        name="使用分块索引",
+        description="地图文件读取或生成 .pmtidx 索引文件",
+        default=True,
+    )  # type: ignore
+    workers: IntProperty(
+        name="进程数",
+        description="解析进程数量, 0 表示使用全部 CPU 核心",
+        default=0,
+        min=0,
+    )  # type: ignore
+
+    def execute(self, context: bpy.types.Context) -> Set[str]:
+        # 进程池和解析模块在首次批量导入时才加载
+        from ..profiler import Profiler
+
+        worker = worker_module()
+
+        filepaths = self._collect_files(worker)
+        if not filepaths:
+            self.report({"ERROR"}, "没有找到可导入的文件")
+            return {"CANCELLED"}
+
+        max_workers = min(self.workers or os.cpu_count() or 1, len(filepaths))
+        log.debug(">>> 批量导入 %s 个文件, %s 个进程", len(filepaths), max_workers)
+
+        disk_cache = preferences.disk_cache()
+        cache_options = (
+            (disk_cache.directory, disk_cache.max_bytes) if disk_cache else ("", 0)
+        )
+
+        profile = Profiler(f"batch-{len(filepaths)}")
+
+        # 内存缓存命中的文件不再提交给进程池
+        memory = preferences.memory_cache()
+        cached = worker.cached_results(memory, filepaths, self.mesh_layout, profile)
+
+        importer = MeshImporter(context, profile)
+        imported = 0
+        failed = 0
+        with worker.process_pool(max_workers) as executor:
+            futures = [
+                None
+                if filepath in cached
+                else executor.submit(
+                    worker.parse_file,
+                    filepath,
+                    self.mesh_layout,
+                    self.use_index,
+                    *cache_options,
+                )
+                for filepath in filepaths
+            ]
+
+            # 按文件顺序创建数据块
+            for filepath, future in zip(filepaths, futures):
+                try:
+                    if future is None:
+                        kind, meta, arrays = cached.pop(filepath)
+                        parsed = worker.ParsedFile(filepath, kind, meta)
+                        self._create(context, worker, importer, parsed, arrays, profile)
+                    else:
+                        parsed = future.result()
+                        profile.merge(parsed.stages)
+                        with worker.attach_arrays(parsed) as arrays:
+                            self._create(
+                                context, worker, importer, parsed, arrays, profile
+                            )
+                            worker.store_result(
+                                memory, parsed, arrays, self.mesh_layout, profile
+                            )
+                    imported += 1
+                except Exception as e:
+                    log.error("! 导入失败 %s: %s", filepath, e)
+                    trace_exc()
+                    failed += 1
+
+        if failed:
+            self.report({"WARNING"}, f"成功导入 {imported} 个文件, {failed} 个失败")
+        else:
+            self.report({"INFO"}, f"成功导入 {imported} 个文件")
+        preferences.report_profile(self, profile)
+        return {"FINISHED"} if imported else {"CANCELLED"}
+
+    def _collect_files(self, worker) -> List[str]:
+        """多选文件优先, 未选择文件时导入整个文件夹"""
+        names = [f.name for f in self.files if f.name]
+        if not names:
+            names = sorted(os.listdir(self.directory))
+        return [
+            os.path.join(self.directory, name)
+            for name in names
+            if worker.loader.file_kind(name)
+            and os.path.isfile(os.path.join(self.directory, name))
+        ]
+
+    def _create(self, context, worker, importer, parsed, arrays, profile) -> None:
+        """在主线程中创建数据块"""
+        if parsed.kind == "mesh":
+            for idx, chunk in enumerate(worker.mesh_chunks(parsed, arrays), 1):
+                importer.create_mesh_object(chunk, chunk.name or parsed.name, idx)
+
+        elif parsed.kind == "anim":
+            vertex_groups = {name: arrays[name] for name in parsed.meta}
+            if vertex_groups:
+                total_frames = max(len(frames) for frames in vertex_groups.values())
+                context.scene.frame_end = max(context.scene.frame_end, total_frames)
+            frame_count = sum(len(frames) for frames in vertex_groups.values())
+            with profile.stage("keyframes", items=frame_count):
+                create_group_objects(context, vertex_groups, parsed.name)
+
+        elif parsed.kind == "skel":
+            bones = list(zip(parsed.meta, arrays["levels"].tolist()))
+            with profile.stage("armature", items=len(bones)):
+                create_armature(context, parsed.name, bones, arrays["transforms"])
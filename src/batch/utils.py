@@ -0,0 +1,198 @@
+"""
+batch.utils
+~~~~~~~~~~~
+
+批量导入的解析进程 (不依赖 bpy)。
+
+每个文件在子进程中解析, 解码后的数组整体写入一块共享内存,
+返回给主线程的只有共享内存名称和每个数组的位置、类型、形状,
+主线程直接在共享内存上查看数组并创建 Blender 数据块。
+"""
+
+import contextlib
+import multiprocessing
+import os
+import runpy
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .. import engine, loader
+from ..cache import DiskCache, MemoryCache
+from ..log import log
+from ..profiler import Profiler
+
+# 常量定义
+ALIGNMENT = 64
+# 子进程的初始化脚本
+BOOTSTRAP = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bootstrap.py")
+
+# (名称, 偏移, 类型, 形状)
+ArraySpec = Tuple[str, int, str, Tuple[int, ...]]
+
+# Windows 下最后一个句柄关闭时共享内存即被释放,
+# 子进程需要保持句柄直到进程池关闭
+_keep_alive: List[shared_memory.SharedMemory] = []
+
+
+@dataclass
+class ParsedFile:
+    """子进程的解析结果"""
+
+    filepath: str
+    kind: str
+    meta: List[Any] = field(default_factory=list)
+    shm_name: str = ""
+    specs: List[ArraySpec] = field(default_factory=list)
+    # 子进程中各阶段的耗时, 见 Profiler.to_dict()
+    stages: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+
+    @property
+    def name(self) -> str:
+        """文件名 (不包含扩展名)"""
+        return os.path.splitext(os.path.basename(self.filepath))[0]
+
+
+def package_chain() -> List[Tuple[str, List[str], str]]:
+    """插件包及其上级包的 (包名, 搜索路径, __init__.py 路径), 上级包在前
+
+    只有插件包本身执行 __init__.py, 上级包 (例如 Blender 的 bl_ext)
+    在子进程中只需要能找到子包。
+    """
+    root = __package__.rpartition(".")[0]
+    parts = root.split(".")
+    chain = []
+    for i in range(1, len(parts) + 1):
+        name = ".".join(parts[:i])
+        module = sys.modules[name]
+        init_file = (getattr(module, "__file__", None) or "") if name == root else ""
+        chain.append((name, list(module.__path__), init_file))
+    return chain
+
+
+def process_pool(max_workers: int) -> ProcessPoolExecutor:
+    """解析进程池
+
+    子进程启动时执行 bootstrap.py, 按主进程中的包名登记插件包,
+    主进程不需要以其他名称再次导入插件。
+    """
+    return ProcessPoolExecutor(
+        max_workers=max_workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=runpy.run_path,
+        initargs=(BOOTSTRAP, {"PACKAGES": package_chain()}),
+    )
+
+
+def share_arrays(arrays: Dict[str, Any]) -> Tuple[str, List[ArraySpec]]:
+    """把所有数组写入一块共享内存, 返回 (共享内存名称, 数组位置表)"""
+    arrays = {key: np.ascontiguousarray(array) for key, array in arrays.items()}
+
+    specs = []
+    size = 0
+    for key, array in arrays.items():
+        offset = (size + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+        specs.append((key, offset, array.dtype.str, array.shape))
+        size = offset + array.nbytes
+
+    shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+    for (_, offset, dtype, shape), array in zip(specs, arrays.values()):
+        np.ndarray(shape, dtype, buffer=shm.buf, offset=offset)[...] = array
+
+    name = shm.name
+    if os.name == "nt":
+        _keep_alive.append(shm)
+    else:
+        shm.close()
+    return name, specs
+
+
+@contextlib.contextmanager
+def attach_arrays(parsed: ParsedFile):
+    """在共享内存上查看解析结果中的数组, 退出时释放共享内存"""
+    shm = shared_memory.SharedMemory(name=parsed.shm_name)
+    arrays = {
+        key: np.ndarray(shape, dtype, buffer=shm.buf, offset=offset)
+        for key, offset, dtype, shape in parsed.specs
+    }
+    try:
+        yield arrays
+    finally:
+        arrays.clear()
+        try:
+            shm.close()
+        except BufferError:
+            log.debug("! 共享内存仍被引用, 交由垃圾回收释放: %s", parsed.shm_name)
+        shm.unlink()
+
+
+def parse_file(
+    filepath: str,
+    layout_name: str = "auto",
+    use_index: bool = True,
+    cache_directory: str = "",
+    cache_max_bytes: int = 0,
+) -> ParsedFile:
+    """解析单个文件 (在子进程中运行)
+
+    子进程读取不到插件设置, 磁盘缓存的目录和上限由主线程传入。
+    """
+    cache = DiskCache(cache_directory, cache_max_bytes) if cache_directory else None
+    profile = Profiler()
+    kind, meta, arrays = loader.load_file(
+        filepath, layout_name, use_index, cache=cache, profile=profile
+    )
+    nbytes = sum(np.asarray(array).nbytes for array in arrays.values())
+    with profile.stage("transfer", nbytes, len(arrays)):
+        shm_name, specs = share_arrays(arrays)
+    return ParsedFile(filepath, kind, meta, shm_name, specs, profile.to_dict()["stages"])
+
+
+def cached_results(
+    memory: Optional[MemoryCache],
+    filepaths: List[str],
+    layout_name: str,
+    profile: Profiler,
+) -> Dict[str, Tuple[str, List[Any], Dict[str, Any]]]:
+    """在进程内缓存中查找文件 (在主线程中运行), 返回 {路径: (文件类型, 元数据, 数组表)}
+
+    命中的文件不再提交给进程池; memory 为 None 时 (未启用) 返回空表。
+    """
+    cached = {}
+    if memory is None:
+        return cached
+    for filepath in filepaths:
+        with profile.stage("cache"):
+            result = memory.get(loader.memory_key(filepath, layout_name))
+        if result is not None:
+            cached[filepath] = result
+    return cached
+
+
+def store_result(
+    memory: Optional[MemoryCache],
+    parsed: ParsedFile,
+    arrays: Dict[str, Any],
+    layout_name: str,
+    profile: Profiler,
+) -> None:
+    """把子进程的解析结果写入进程内缓存 (在共享内存释放之前调用)
+
+    共享内存上的数组由 MemoryCache.put 复制。
+    """
+    if memory is None or not arrays:
+        return
+    with profile.stage("cache"):
+        memory.put(
+            loader.memory_key(parsed.filepath, layout_name),
+            (parsed.kind, parsed.meta, arrays),
+        )
+
+
+def mesh_chunks(parsed: ParsedFile, arrays: Dict[str, Any]) -> List[engine.MeshChunk]:
+    """从共享内存数组重建网格块"""
+    return loader.mesh_chunks(parsed.meta, arrays)
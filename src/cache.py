@@ -0,0 +1,290 @@
+"""
+cache
+~~~~~
+
+解析结果的磁盘缓存和进程内缓存 (不依赖 bpy)。
+
+每个条目是一个目录, 名称由解析器版本、文件类型、布局和文件内容
+哈希组成 (.anim 的解析结果与文件名有关, 文件名也计入哈希);
+目录中每个数组保存为一个 .npy 文件 (读取时内存映射), 元数据保存在
+meta.json。解析器版本是解析相关源文件的哈希, 导入时计算一次;
+修改这些文件后旧条目不再命中, 并在下次清理时优先删除。超过容量上限时按最近使用时间删除条目。
+
+进程内缓存 (MemoryCache) 以路径、文件大小和修改时间为键, 保存在
+当前 Blender 会话中, 同样按最近使用时间淘汰。
+"""
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .log import log
+
+# 常量定义
+# 决定解析结果的源文件 (相对包目录), 内容计入解析器版本
+PARSER_SOURCES = (
+    "engine.py",
+    "tools.py",
+    "loader.py",
+    "mesh_map/index.py",
+    "anim/utils.py",
+    "skel/utils.py",
+)
+VERSION_SIZE = 6
+HASH_SIZE = 20
+META_NAME = "meta.json"
+TEMP_PREFIX = ".tmp-"
+# 超过该时间 (秒) 的临时目录视为中断的写入
+TEMP_MAX_AGE = 60
+ENTRY_PATTERN = re.compile(r"^(v[0-9a-f]+-|\.tmp-)")
+DEFAULT_MAX_BYTES = 2 * 1024 * 1024 * 1024
+DEFAULT_MEMORY_BYTES = 1024 * 1024 * 1024
+
+
+def parser_version(
+    directory: str = os.path.dirname(os.path.abspath(__file__)),
+    sources: Tuple[str, ...] = PARSER_SOURCES,
+) -> str:
+    """解析器版本: PARSER_SOURCES 内容的十六进制哈希, 读取失败的文件按空内容计算"""
+    hasher = hashlib.blake2b(digest_size=VERSION_SIZE)
+    for source in sources:
+        hasher.update(source.encode("utf-8") + b"\x00")
+        try:
+            with open(os.path.join(directory, *source.split("/")), "rb") as f:
+                hasher.update(f.read())
+        except OSError as e:
+            log.debug("! 读取解析器源文件失败: %s", e)
+        hasher.update(b"\x00")
+    return hasher.hexdigest()
+
+
+PARSER_VERSION = parser_version()
+
+
+def _to_json(value):
+    """元组转为列表, 其余原样保存"""
+    if isinstance(value, (list, tuple)):
+        return [_to_json(item) for item in value]
+    return value
+
+
+def _from_json(kind: str, meta: List[Any]) -> List[Any]:
+    """还原元数据: 网格块的 (名称, 贴图路径) 为元组"""
+    if kind == "mesh":
+        return [tuple(item) for item in meta]
+    return meta
+
+
+class DiskCache:
+    """解析结果的磁盘缓存"""
+
+    def __init__(self, directory: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def key(self, data: bytes, kind: str, layout_name: str = "", name: str = "") -> str:
+        """缓存键: 解析器版本 + 文件类型 + 布局 + 内容哈希
+
+        解析结果与文件名有关时 (.anim) 传入 name, 与内容一起计入哈希。
+        """
+        hasher = hashlib.blake2b(data, digest_size=HASH_SIZE)
+        if name:
+            hasher.update(b"\x00" + name.encode("utf-8"))
+        return f"v{PARSER_VERSION}-{kind}-{layout_name or kind}-{hasher.hexdigest()}"
+
+    def _entry(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+
+    def load(self, key: str) -> Optional[Tuple[List[Any], Dict[str, Any]]]:
+        """读取缓存条目, 数组以只读内存映射返回; 未命中或损坏时返回 None"""
+        entry = self._entry(key)
+        try:
+            with open(os.path.join(entry, META_NAME), encoding="utf-8") as f:
+                stored = json.load(f)
+            arrays = {
+                name: np.load(os.path.join(entry, f"{index}.npy"), mmap_mode="r")
+                for index, name in enumerate(stored["keys"])
+            }
+            # 更新最近使用时间
+            os.utime(entry)
+        except (OSError, ValueError, KeyError) as e:
+            if not isinstance(e, FileNotFoundError):
+                log.debug("! 缓存条目损坏: %s %s", key, e)
+            return None
+
+        log.debug("> 缓存命中: %s", key)
+        return _from_json(stored["kind"], stored["meta"]), arrays
+
+    def store(self, key: str, kind: str, meta: List[Any], arrays: Dict[str, Any]) -> bool:
+        """写入缓存条目, 先写临时目录再改名, 失败时仅记录日志"""
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            temp = tempfile.mkdtemp(prefix=TEMP_PREFIX, dir=self.directory)
+            try:
+                for index, array in enumerate(arrays.values()):
+                    np.save(os.path.join(temp, f"{index}.npy"), np.asarray(array))
+                stored = {"kind": kind, "meta": _to_json(meta), "keys": list(arrays)}
+                with open(os.path.join(temp, META_NAME), "w", encoding="utf-8") as f:
+                    json.dump(stored, f, ensure_ascii=False)
+                os.replace(temp, self._entry(key))
+            except OSError:
+                shutil.rmtree(temp, ignore_errors=True)
+                raise
+        except OSError as e:
+            log.debug("! 写入缓存失败: %s", e)
+            return False
+
+        log.debug("> 写入缓存: %s", key)
+        self.evict()
+        return True
+
+    def entries(self) -> List[Tuple[float, int, str]]:
+        """所有条目的 (最近使用时间, 字节数, 路径)"""
+        result = []
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return result
+        for name in names:
+            # 只处理缓存自己创建的目录
+            if not ENTRY_PATTERN.match(name):
+                continue
+            entry = os.path.join(self.directory, name)
+            try:
+                size = sum(f.stat().st_size for f in os.scandir(entry))
+                result.append((os.stat(entry).st_mtime, size, entry))
+            except OSError:
+                continue
+        return result
+
+    def evict(self) -> int:
+        """删除其他解析器版本的条目和遗留的临时目录,
+        再按最近使用时间删除条目直到不超过容量上限, 返回删除数量"""
+        prefix = f"v{PARSER_VERSION}-"
+        entries = []
+        removed = 0
+        for mtime, size, entry in self.entries():
+            name = os.path.basename(entry)
+            if name.startswith(prefix):
+                entries.append((mtime, size, entry))
+            elif name.startswith(TEMP_PREFIX) and time.time() - mtime < TEMP_MAX_AGE:
+                # 可能正在写入
+                continue
+            else:
+                shutil.rmtree(entry, ignore_errors=True)
+                removed += 1
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+            removed += 1
+
+        if removed:
+            log.debug("> 清理缓存: 删除 %s 个条目", removed)
+        return removed
+
+    def clear(self) -> int:
+        """删除所有条目, 返回删除数量"""
+        entries = self.entries()
+        for _, _, entry in entries:
+            shutil.rmtree(entry, ignore_errors=True)
+        return len(entries)
+
+
+def _own_array(array) -> np.ndarray:
+    """内存缓存保存的数组: 自有数据的连续数组原样保存,
+    内存映射 (DiskCache.load 的结果)、共享内存和其他缓冲区上的视图复制一份"""
+    if (
+        isinstance(array, np.ndarray)
+        and not isinstance(array, np.memmap)
+        and array.flags.owndata
+        and array.flags.c_contiguous
+    ):
+        return array
+    return np.array(array, order="C", copy=True)
+
+
+class MemoryCache:
+    """进程内解析结果缓存"""
+
+    def __init__(self, max_bytes: int = DEFAULT_MEMORY_BYTES):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._entries: "OrderedDict[tuple, Tuple[str, List[Any], Dict[str, Any]]]" = (
+            OrderedDict()
+        )
+        self._sizes: Dict[tuple, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def key(filepath: str, layout_name: str = "") -> tuple:
+        """缓存键: 路径 + 布局 + 文件大小 + 修改时间"""
+        stat = os.stat(filepath)
+        return (os.path.abspath(filepath), layout_name, stat.st_size, stat.st_mtime_ns)
+
+    def get(self, key: tuple) -> Optional[Tuple[str, List[Any], Dict[str, Any]]]:
+        """读取缓存, 命中时标记为最近使用"""
+        result = self._entries.get(key)
+        if result is not None:
+            self._entries.move_to_end(key)
+            log.debug("> 内存缓存命中: %s", key[0])
+        return result
+
+    def put(self, key: tuple, result: Tuple[str, List[Any], Dict[str, Any]]) -> bool:
+        """保存解析结果, 超过容量上限的结果不保存
+
+        不引用内存映射的缓存文件或共享内存, 需要时复制数组,
+        容量按实际占用的内存计算。
+        """
+        kind, meta, arrays = result
+        arrays = {name: _own_array(array) for name, array in arrays.items()}
+        size = sum(array.nbytes for array in arrays.values())
+        if size > self.max_bytes:
+            return False
+
+        # 同一文件的旧版本不会再命中
+        for old in [k for k in self._entries if k[:2] == key[:2]]:
+            self._remove(old)
+
+        self._entries[key] = (kind, meta, arrays)
+        self._sizes[key] = size
+        self.total_bytes += size
+        self.evict()
+        return True
+
+    def _remove(self, key: tuple) -> None:
+        del self._entries[key]
+        self.total_bytes -= self._sizes.pop(key)
+
+    def evict(self) -> int:
+        """按最近使用时间删除条目直到不超过容量上限, 返回删除数量"""
+        removed = 0
+        while self._entries and self.total_bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            removed += 1
+        return removed
+
+    def clear(self) -> int:
+        """删除所有条目, 返回删除数量"""
+        count = len(self._entries)
+        self._entries.clear()
+        self._sizes.clear()
+        self.total_bytes = 0
+        return count
+
+
+# 当前会话共用的进程内缓存
+memory_cache = MemoryCache()
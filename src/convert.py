@@ -0,0 +1,351 @@
+"""
+convert
+~~~~~~~
+
+不依赖 Blender 的命令行转换工具。
+
+用法::
+
+    python -m pde_model_tools [-f glb|obj|npz] [-o 输出目录] [-j 进程数] 文件或通配符...
+
+.mesh 文件可输出 glb / obj / npz, .skel 和 .anim 文件总是输出 npz。
+"""
+
+import argparse
+import glob
+import json
+import os
+import struct
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from . import loader
+from .log import set_level
+
+# 常量定义
+FORMATS = ("glb", "obj", "npz")
+MB = 1024 * 1024
+# -v 的次数 -> 日志级别
+VERBOSITY = ("WARNING", "DEBUG", "VERBOSE")
+
+# npz 中元数据的键前缀, 数据数组按文件类型使用其他前缀
+NPZ_META = "meta/"
+# 文件类型 -> 统计的元素
+ELEMENT_NAMES = {"mesh": "顶点", "anim": "帧", "skel": "骨骼"}
+
+GLB_MAGIC = b"glTF"
+GLB_VERSION = 2
+GLB_CHUNK_JSON = b"JSON"
+GLB_CHUNK_BIN = b"BIN\x00"
+GL_FLOAT = 5126
+GL_UNSIGNED_INT = 5125
+GL_ARRAY_BUFFER = 34962
+GL_ELEMENT_ARRAY_BUFFER = 34963
+
+
+def valid_faces(faces, vertex_count: int):
+    """丢弃引用了不存在顶点的三角面"""
+    faces = np.asarray(faces, dtype=np.int64).reshape(-1, 3)
+    return faces[((faces >= 0) & (faces < vertex_count)).all(axis=1)]
+
+
+def npz_key(kind: str, key: str) -> str:
+    """数据数组在 npz 中的键, 不会与元数据或 savez 的参数重名
+
+    - mesh: chunk_<序号>/<字段>
+    - anim: groups/<顶点组名称>
+    - skel: bones/levels, bones/transforms
+    """
+    if kind == "mesh":
+        index, field = key.split(".", 1)
+        return f"chunk_{index}/{field}"
+    if kind == "anim":
+        return f"groups/{key}"
+    return f"bones/{key}"
+
+
+def write_npz(path: str, kind: str, meta, arrays) -> None:
+    """写入 npz: 数组原样保存, 文件类型、名称等元数据以 meta/ 为前缀保存为字符串数组"""
+    data = {npz_key(kind, key): array for key, array in arrays.items()}
+    data[f"{NPZ_META}kind"] = np.array(kind)
+    if kind == "mesh":
+        data[f"{NPZ_META}names"] = np.array([name for name, _ in meta], dtype=str)
+        data[f"{NPZ_META}colormaps"] = np.array(
+            [colormap for _, colormap in meta], dtype=str
+        )
+    else:
+        data[f"{NPZ_META}names"] = np.array(meta, dtype=str)
+    np.savez(path, **data)
+
+
+def write_mtl(path: str, chunks) -> None:
+    """写入 obj 的材质库, 每个贴图名称一个材质, 注释中记录原贴图路径"""
+    colormaps = {}
+    for chunk in chunks:
+        if chunk.colormap_name:
+            colormaps.setdefault(chunk.colormap_name, chunk.colormap_path)
+    with open(path, "w", encoding="utf-8", newline="\n") as f:
+        for colormap, colormap_path in colormaps.items():
+            f.write(f"newmtl {colormap}\n# {colormap_path}\n")
+            f.write("Kd 1.000000 1.000000 1.000000\n")
+
+
+def write_obj(path: str, name: str, chunks) -> None:
+    """写入 obj, 每个网格块一个对象
+
+    有贴图时在旁边写入同名 .mtl 材质库, 由 mtllib 引用。
+    """
+    offset = 1
+    with open(path, "w", encoding="utf-8", newline="\n") as f:
+        if any(chunk.colormap_name for chunk in chunks):
+            mtl_path = os.path.splitext(path)[0] + ".mtl"
+            write_mtl(mtl_path, chunks)
+            f.write(f"mtllib {os.path.basename(mtl_path)}\n")
+        for index, chunk in enumerate(chunks):
+            f.write(f"o {chunk.name or name}_{index}\n")
+            if chunk.colormap_name:
+                f.write(f"usemtl {chunk.colormap_name}\n")
+            np.savetxt(f, chunk.positions, fmt="v %.6f %.6f %.6f")
+            np.savetxt(f, chunk.normals, fmt="vn %.6f %.6f %.6f")
+            np.savetxt(f, chunk.uvs, fmt="vt %.6f %.6f")
+            faces = valid_faces(chunk.faces, len(chunk.positions)) + offset
+            np.savetxt(f, np.repeat(faces, 3, axis=1), fmt="f %d/%d/%d %d/%d/%d %d/%d/%d")
+            offset += len(chunk.positions)
+
+
+def write_glb(path: str, name: str, chunks) -> None:
+    """写入二进制 glTF, 每个网格块一个节点"""
+    buffer = bytearray()
+    views: List[dict] = []
+    accessors: List[dict] = []
+
+    def add_accessor(array, target, accessor_type, component_type, bounds=False):
+        buffer.extend(b"\x00" * (-len(buffer) % 4))
+        views.append(
+            {
+                "buffer": 0,
+                "byteOffset": len(buffer),
+                "byteLength": array.nbytes,
+                "target": target,
+            }
+        )
+        buffer.extend(array.tobytes())
+        accessor = {
+            "bufferView": len(views) - 1,
+            "componentType": component_type,
+            "count": len(array),
+            "type": accessor_type,
+        }
+        if bounds:
+            accessor["min"] = array.min(axis=0).tolist()
+            accessor["max"] = array.max(axis=0).tolist()
+        accessors.append(accessor)
+        return len(accessors) - 1
+
+    materials: List[dict] = []
+    material_index = {}
+    meshes: List[dict] = []
+    nodes: List[dict] = []
+    for index, chunk in enumerate(chunks):
+        positions = np.ascontiguousarray(chunk.positions, dtype="<f4").reshape(-1, 3)
+        faces = valid_faces(chunk.faces, len(positions))
+        if not len(positions) or not len(faces):
+            continue
+
+        # glTF 要求单位法线
+        normals = np.asarray(chunk.normals, dtype="<f4").reshape(-1, 3)
+        lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+        normals = np.where(lengths > 0, normals / np.where(lengths > 0, lengths, 1), [0, 0, 1])
+        # glTF 的 UV 原点在左上角, 还原导入时的 V 翻转
+        uvs = np.array(chunk.uvs, dtype="<f4").reshape(-1, 2)
+        uvs[:, 1] = 1.0 - uvs[:, 1]
+
+        primitive = {
+            "attributes": {
+                "POSITION": add_accessor(positions, GL_ARRAY_BUFFER, "VEC3", GL_FLOAT, True),
+                "NORMAL": add_accessor(
+                    normals.astype("<f4"), GL_ARRAY_BUFFER, "VEC3", GL_FLOAT
+                ),
+                "TEXCOORD_0": add_accessor(uvs, GL_ARRAY_BUFFER, "VEC2", GL_FLOAT),
+            },
+            "indices": add_accessor(
+                faces.astype("<u4").ravel(),
+                GL_ELEMENT_ARRAY_BUFFER,
+                "SCALAR",
+                GL_UNSIGNED_INT,
+            ),
+        }
+
+        colormap = chunk.colormap_name
+        if colormap:
+            if colormap not in material_index:
+                material_index[colormap] = len(materials)
+                materials.append({"name": colormap})
+            primitive["material"] = material_index[colormap]
+
+        object_name = f"{chunk.name or name}_{index}"
+        meshes.append({"name": object_name, "primitives": [primitive]})
+        nodes.append({"name": object_name, "mesh": len(meshes) - 1})
+
+    document = {
+        "asset": {"version": "2.0", "generator": "PDE Model Tools"},
+        "scene": 0,
+        "scenes": [{"name": name, "nodes": list(range(len(nodes)))}],
+        "nodes": nodes,
+        "meshes": meshes,
+        "accessors": accessors,
+        "bufferViews": views,
+        "buffers": [{"byteLength": len(buffer)}],
+    }
+    if materials:
+        document["materials"] = materials
+
+    json_chunk = json.dumps(document, ensure_ascii=False, separators=(",", ":")).encode()
+    json_chunk += b" " * (-len(json_chunk) % 4)
+    buffer.extend(b"\x00" * (-len(buffer) % 4))
+
+    with open(path, "wb") as f:
+        total = 12 + 8 + len(json_chunk) + 8 + len(buffer)
+        f.write(struct.pack("<4sII", GLB_MAGIC, GLB_VERSION, total))
+        f.write(struct.pack("<I4s", len(json_chunk), GLB_CHUNK_JSON))
+        f.write(json_chunk)
+        f.write(struct.pack("<I4s", len(buffer), GLB_CHUNK_BIN))
+        f.write(buffer)
+
+
+def output_path(filepath: str, output_dir: Optional[str], extension: str) -> str:
+    """输出文件路径, 未指定输出目录时写到源文件旁边"""
+    name = os.path.splitext(os.path.basename(filepath))[0] + "." + extension
+    return os.path.join(output_dir or os.path.dirname(filepath), name)
+
+
+def convert_file(
+    filepath: str,
+    output_dir: Optional[str] = None,
+    fmt: str = "glb",
+    layout_name: str = "auto",
+    use_index: bool = True,
+) -> Tuple[str, int, int, float]:
+    """转换单个文件, 返回 (输出路径, 输入字节数, 顶点/帧/骨骼数, 耗时)
+
+    没有解析出任何顶点、帧或骨骼时抛出 ValueError, 不写输出文件。
+    """
+    start = time.perf_counter()
+    name = os.path.splitext(os.path.basename(filepath))[0]
+    kind, meta, arrays = loader.load_file(filepath, layout_name, use_index)
+
+    if kind != "mesh":
+        fmt = "npz"
+    path = output_path(filepath, output_dir, fmt)
+
+    if kind == "mesh":
+        chunks = loader.mesh_chunks(meta, arrays)
+        elements = sum(len(chunk.positions) for chunk in chunks)
+    elif kind == "anim":
+        elements = sum(len(frames) for frames in arrays.values())
+    else:
+        elements = len(meta)
+    if not elements:
+        raise ValueError(f"没有解析出任何{ELEMENT_NAMES[kind]}")
+
+    if fmt == "glb":
+        write_glb(path, name, chunks)
+    elif fmt == "obj":
+        write_obj(path, name, chunks)
+    else:
+        write_npz(path, kind, meta, arrays)
+
+    return path, os.path.getsize(filepath), elements, time.perf_counter() - start
+
+
+def expand_patterns(patterns: List[str]) -> List[str]:
+    """展开通配符 (支持 **), 只保留支持的文件类型, 去重并保持顺序"""
+    filepaths = {}
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern, recursive=True)) or [pattern]
+        for match in matches:
+            if os.path.isfile(match) and loader.file_kind(match):
+                filepaths.setdefault(os.path.abspath(match), None)
+    return list(filepaths)
+
+
+def _init_worker(level: str) -> None:
+    """子进程日志级别"""
+    set_level(level)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m pde_model_tools",
+        description="将 PDE .mesh / .skel / .anim 文件转换为 glb / obj / npz",
+    )
+    parser.add_argument("patterns", nargs="+", help="文件路径或通配符, 支持 **")
+    parser.add_argument(
+        "-f", "--format", choices=FORMATS, default="glb",
+        help=".mesh 的输出格式 (.skel 和 .anim 总是输出 npz)",
+    )
+    parser.add_argument("-o", "--output", help="输出目录, 默认写到源文件旁边")
+    parser.add_argument(
+        "-j", "--workers", type=int, default=os.cpu_count() or 1, help="并行进程数"
+    )
+    parser.add_argument(
+        "--layout", choices=loader.LAYOUT_NAMES, default="auto", help=".mesh 布局"
+    )
+    parser.add_argument(
+        "--no-index", action="store_true", help="不读取或生成地图 .pmtidx 索引"
+    )
+    parser.add_argument(
+        "-v", "--verbose", action="count", default=0,
+        help="输出调试日志, -vv 另外输出可恢复错误的调用栈",
+    )
+    args = parser.parse_args(argv)
+
+    level = VERBOSITY[min(args.verbose, len(VERBOSITY) - 1)]
+    set_level(level)
+
+    filepaths = expand_patterns(args.patterns)
+    if not filepaths:
+        print("没有找到可转换的文件", file=sys.stderr)
+        return 1
+    if args.output:
+        os.makedirs(args.output, exist_ok=True)
+
+    options = (args.output, args.format, args.layout, not args.no_index)
+    workers = max(1, min(args.workers, len(filepaths)))
+    failed = 0
+    total_bytes = 0
+    start = time.perf_counter()
+
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(level,)
+    ) as executor:
+        futures = {
+            executor.submit(convert_file, filepath, *options): filepath
+            for filepath in filepaths
+        }
+        for future in as_completed(futures):
+            filepath = futures[future]
+            try:
+                path, size, elements, elapsed = future.result()
+            except Exception as e:
+                failed += 1
+                print(f"FAIL {filepath}: {e}", file=sys.stderr)
+                continue
+            total_bytes += size
+            rate = size / MB / elapsed if elapsed else 0.0
+            print(
+                f"{filepath} -> {path}  {size / MB:.2f} MB  {elements} 元素  "
+                f"{elapsed:.3f} s  {rate:.1f} MB/s"
+            )
+
+    elapsed = time.perf_counter() - start
+    print(
+        f"完成 {len(filepaths) - failed}/{len(filepaths)} 个文件, "
+        f"{total_bytes / MB:.2f} MB, {elapsed:.2f} s, "
+        f"{total_bytes / MB / elapsed if elapsed else 0.0:.1f} MB/s"
+    )
+    return 1 if failed else 0
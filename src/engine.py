@@ -0,0 +1,309 @@
+"""
+engine
+~~~~~~
+
+不依赖 bpy 的 PDE 网格解析引擎。
+
+地图、道具、人物&武器三种 .mesh 文件共用同一套网格块结构,
+区别只在布局配置 (Layout) 中描述:
+- UV 距顶点块末尾的偏移 (0x10 / 0x8)
+- 文件开头是否为名称表
+- 网格块之间是否需要扫描下一个头部
+- ColorMap 是否只在本块与下一个头部之间查找
+
+解析分两步: scan_chunks 定位所有网格块, decode_chunks 解码数组
+(可在线程池中按网格块并行)。
+"""
+
+import struct
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, List, Optional, Tuple
+
+from . import tools
+from .log import log, tracing
+from .profiler import NULL, Profiler
+
+# 常量定义
+HEADER_SIZE = 0x1D
+VERTEX_HEADER_OFFSET = 0x19
+FIRST_HEADER_SIZE = 0x18
+BOUNDS_SIZE = 0x18
+FACE_SIZE = 0xC
+# 网格块少于该数量时直接解码, 线程池的开销比并行节省的时间多
+PARALLEL_MIN_CHUNKS = 8
+
+
+@dataclass(frozen=True)
+class Layout:
+    """网格文件布局配置"""
+
+    name: str
+    uv_offset: int
+    named: bool = False
+    resync: bool = False
+    bounded_colormap: bool = False
+
+
+MAP = Layout("map", uv_offset=0x10, resync=True, bounded_colormap=True)
+PROP = Layout("prop", uv_offset=0x10)
+CHARACTER = Layout("character", uv_offset=0x8, named=True, resync=True)
+
+LAYOUTS = {layout.name: layout for layout in (MAP, PROP, CHARACTER)}
+
+
+@dataclass
+class MeshChunk:
+    """网格块: 位置信息和解码后的数组"""
+
+    header_offset: int = 0
+    total_count: int = 0
+    vertex_count: int = 0
+    byte_size: int = 0
+    block_size: int = 0
+    faces_start: int = 0
+    faces_size: int = 0
+    colormap_path: str = ""
+    name: str = ""
+
+    positions: Any = None
+    normals: Any = None
+    uvs: Any = None
+    faces: Any = None
+
+    @property
+    def vertex_start(self) -> int:
+        """顶点块起始位置"""
+        return self.header_offset + HEADER_SIZE
+
+    @property
+    def vertex_end(self) -> int:
+        """顶点块结束位置"""
+        return self.vertex_start + self.byte_size
+
+    @property
+    def faces_end(self) -> int:
+        """面块结束位置"""
+        return self.faces_start + self.faces_size
+
+    @property
+    def colormap_name(self) -> str:
+        """贴图名称"""
+        return extract_name_from_path(self.colormap_path)
+
+
+def extract_name_from_path(path: str) -> str:
+    """从路径中提取文件名（不包含扩展名）"""
+    try:
+        file_name = path.split("/")[-1]
+        return file_name.split(".")[0]
+    except Exception:
+        return ""
+
+
+def read_name_table(data: bytes) -> Tuple[List[str], int]:
+    """读取人物&武器文件开头的名称表, 返回 (名称列表, 第一个网格块位置)"""
+    try:
+        (count,) = struct.unpack_from("<I", data, 0)
+        position = 0x4
+
+        names = []
+        for _ in range(count):
+            (name_length,) = struct.unpack_from("<I", data, position)
+            position += 0x4
+            name = bytes(data[position : position + name_length]).decode("utf-8")
+            log.debug("对象名称: %s", name)
+            names.append(name)
+            position += name_length
+
+        (count2,) = struct.unpack_from("<I", data, position)
+        position += 0x4
+    except (struct.error, UnicodeDecodeError) as e:
+        raise ValueError(f"读取头部信息失败: {e}") from e
+
+    # 检查头部数量是否一致
+    if count != count2:
+        raise ValueError("头部信息解析失败: 包含的对象数量不一致")
+
+    # 跳过物体的 MinPos MaxPos
+    return names, position + count * BOUNDS_SIZE
+
+
+def read_chunk(data: bytes, position: int) -> Optional[MeshChunk]:
+    """读取 position 处的网格头部并定位顶点块和面块, 数据无效时返回 None"""
+    if position + HEADER_SIZE > len(data):
+        log.debug("! 头部信息解析失败: 不足的字节数在偏移量 %#x", position)
+        return None
+
+    total_count, _face_groups, vertex_count = struct.unpack_from("<III", data, position)
+    (byte_size,) = struct.unpack_from("<I", data, position + VERTEX_HEADER_OFFSET)
+    log.debug(
+        "<<< 网格物体数量: %#x 顶点数量: %#x 字节总数: %#x",
+        total_count,
+        vertex_count,
+        byte_size,
+    )
+
+    if vertex_count == 0 or byte_size // vertex_count <= 0:
+        log.debug("! 数据块的大小计算失败")
+        return None
+
+    chunk = MeshChunk(
+        header_offset=position,
+        total_count=total_count,
+        vertex_count=vertex_count,
+        byte_size=byte_size,
+        block_size=byte_size // vertex_count,
+    )
+
+    if chunk.vertex_end + 0x4 > len(data):
+        log.debug("! 顶点数据超出边界")
+        return None
+
+    (chunk.faces_size,) = struct.unpack_from("<I", data, chunk.vertex_end)
+    chunk.faces_start = chunk.vertex_end + 0x4
+    if chunk.faces_end > len(data):
+        log.debug("! 面数据超出边界")
+        return None
+
+    return chunk
+
+
+def scan_chunks(data: bytes, layout: Layout, profile: Profiler = NULL) -> List[MeshChunk]:
+    """定位所有网格块 (不解码顶点和面)"""
+    log.debug(">>> 开始定位网格块: %s", layout.name)
+
+    if layout.named:
+        names, position = read_name_table(data)
+        limit = len(names)
+    else:
+        if len(data) < FIRST_HEADER_SIZE:
+            raise ValueError("数据不足")
+        names, position = [], FIRST_HEADER_SIZE
+        limit = None
+
+    with profile.stage("colormap", len(data)):
+        colormaps = tools.find_colormaps(data)
+    chunks: List[MeshChunk] = []
+    trace = tracing()
+
+    while limit is None or len(chunks) < limit:
+        start = time.perf_counter()
+        chunk = read_chunk(data, position)
+        if chunk is None:
+            break
+
+        # 网格数量以第一个头部为准
+        if limit is None:
+            limit = chunk.total_count
+        if names:
+            chunk.name = names[len(chunks)]
+
+        # 查找下一个网格块
+        if layout.resync:
+            next_position = tools.find_header(data, chunk.faces_end, chunk.block_size)
+        else:
+            next_position = chunk.faces_end
+        scanned = time.perf_counter()
+        profile.add("scan", scanned - start, items=1)
+
+        # 查找贴图
+        if layout.bounded_colormap:
+            colormap = (
+                tools.find_colormap(colormaps, chunk.faces_end, next_position)
+                if next_position is not None
+                else None
+            )
+        else:
+            colormap = tools.find_colormap(colormaps, chunk.faces_end)
+        if colormap is not None:
+            chunk.colormap_path = tools.read_colormap_path(data, colormap)
+            if trace:
+                log.debug("> colormap path: %s", chunk.colormap_path)
+        profile.add("colormap", time.perf_counter() - scanned)
+
+        chunks.append(chunk)
+
+        if next_position is None:
+            log.debug("<<< 没有找到下一个头部")
+            break
+        position = next_position
+
+    log.debug("<<< 共定位 %d 个网格块", len(chunks))
+    return chunks
+
+
+def detect_layout(data: bytes) -> Layout:
+    """按文件内容推断布局
+
+    开头的名称表有效为人物&武器, 网格块首尾相接为道具, 否则为地图。
+    """
+    try:
+        names, position = read_name_table(data)
+        if names and read_chunk(data, position) is not None:
+            return CHARACTER
+    except ValueError:
+        pass
+
+    position = FIRST_HEADER_SIZE
+    limit = None
+    count = 0
+    while limit is None or count < limit:
+        chunk = read_chunk(data, position)
+        if chunk is None:
+            return MAP
+        if limit is None:
+            limit = chunk.total_count
+        count += 1
+        position = chunk.faces_end
+    return PROP
+
+
+def decode_chunk(
+    data: bytes, chunk: MeshChunk, layout: Layout, profile: Profiler = NULL
+) -> MeshChunk:
+    """解码网格块的顶点、法线、UV和面"""
+    with profile.stage("vertices", chunk.vertex_count * chunk.block_size, chunk.vertex_count):
+        chunk.positions, chunk.normals, chunk.uvs = tools.read_vertex_block(
+            data, chunk.vertex_start, chunk.vertex_count, chunk.block_size, layout.uv_offset
+        )
+    # 每个三角面 12 字节, 最后一个只需 10 字节
+    face_count = (chunk.faces_size + 2) // FACE_SIZE
+    with profile.stage("faces", chunk.faces_size, face_count):
+        faces = tools.read_faces(data, chunk.faces_start, chunk.faces_size)
+        # 复制为 int32, 结果不再引用文件缓冲区 (内存映射可随时释放)
+        chunk.faces = faces.astype("<i4") if hasattr(faces, "astype") else faces
+    return chunk
+
+
+def decode_chunks(
+    data: bytes,
+    chunks: List[MeshChunk],
+    layout: Layout,
+    workers: int = 1,
+    profile: Profiler = NULL,
+) -> List[MeshChunk]:
+    """解码所有网格块
+
+    workers 大于 1 且网格块不少于 PARALLEL_MIN_CHUNKS 个时在线程池中
+    并行解码 (各网格块互不依赖, NumPy 复制数组期间释放 GIL),
+    结果保持文件顺序。
+    """
+    if workers > 1 and len(chunks) >= PARALLEL_MIN_CHUNKS:
+        with ThreadPoolExecutor(max_workers=min(workers, len(chunks))) as executor:
+            return list(
+                executor.map(
+                    lambda chunk: decode_chunk(data, chunk, layout, profile), chunks
+                )
+            )
+    return [decode_chunk(data, chunk, layout, profile) for chunk in chunks]
+
+
+def parse_mesh(
+    data: bytes, layout: Layout, workers: int = 1, profile: Profiler = NULL
+) -> List[MeshChunk]:
+    """解析 .mesh 数据, 返回解码后的网格块"""
+    return decode_chunks(
+        data, scan_chunks(data, layout, profile), layout, workers, profile
+    )
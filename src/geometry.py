@@ -0,0 +1,72 @@
+"""
+geometry
+~~~~~~~~
+
+批量构建 Blender 网格几何体。
+
+顶点、循环、多边形、UV、平滑标记和自定义法线全部通过 foreach_set
+从连续的 float32 / int32 缓冲区一次写入, 不逐个循环赋值。
+"""
+
+import bpy
+import numpy as np
+
+from .log import log
+from .profiler import NULL, Profiler
+
+# 常量定义
+DEFAULT_UV_LAYER = "UVMap"
+
+
+def build_mesh(
+    mesh: bpy.types.Mesh,
+    positions,
+    faces,
+    normals,
+    uvs,
+    uv_name: str = DEFAULT_UV_LAYER,
+    profile: Profiler = NULL,
+) -> None:
+    """用顶点位置、三角面、逐顶点法线和逐顶点 UV 填充空网格"""
+    positions = np.ascontiguousarray(positions, dtype=np.float32).reshape(-1, 3)
+    normals = np.ascontiguousarray(normals, dtype=np.float32).reshape(-1, 3)
+    uvs = np.ascontiguousarray(uvs, dtype=np.float32).reshape(-1, 2)
+    faces = np.ascontiguousarray(faces, dtype=np.int32).reshape(-1, 3)
+
+    # 丢弃引用了不存在顶点的三角面
+    vertex_count = len(positions)
+    valid = ((faces >= 0) & (faces < vertex_count)).all(axis=1)
+    if not valid.all():
+        log.warning("丢弃 %s 个无效三角面", int((~valid).sum()))
+        faces = np.ascontiguousarray(faces[valid])
+
+    face_count = len(faces)
+    loop_vertices = faces.ravel()
+    loop_count = len(loop_vertices)
+
+    with profile.stage("mesh", positions.nbytes + faces.nbytes, vertex_count):
+        # 顶点
+        mesh.vertices.add(vertex_count)
+        mesh.vertices.foreach_set("co", positions.ravel())
+
+        # 循环和多边形 (全部为三角面)
+        mesh.loops.add(loop_count)
+        mesh.loops.foreach_set("vertex_index", loop_vertices)
+        mesh.polygons.add(face_count)
+        mesh.polygons.foreach_set(
+            "loop_start", np.arange(0, loop_count, 3, dtype=np.int32)
+        )
+        mesh.update(calc_edges=True)
+
+    with profile.stage("attributes", uvs.nbytes + normals.nbytes, loop_count):
+        # UV: 按循环顺序取对应顶点的 UV
+        uv_layer = mesh.uv_layers.new(name=uv_name)
+        uv_layer.data.foreach_set("uv", uvs[loop_vertices].ravel())
+
+        # 平滑着色
+        mesh.polygons.foreach_set("use_smooth", np.ones(face_count, dtype=bool))
+
+        # 自定义法线
+        mesh.normals_split_custom_set_from_vertices(normals)
+
+        mesh.update()
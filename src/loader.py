@@ -0,0 +1,162 @@
+"""
+loader
+~~~~~~
+
+不依赖 bpy 的文件读取入口。
+
+按扩展名解析 .mesh / .anim / .skel 文件, 统一返回
+(文件类型, 元数据, 数组表), 供导入操作、批量导入和命令行转换使用。
+"""
+
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+from . import engine, tools
+from .anim import utils as anim_utils
+from .cache import DiskCache, MemoryCache
+from .mesh_map.utils import MeshFile
+from .profiler import NULL, Profiler
+from .skel import utils as skel_utils
+
+# 常量定义
+MESH_FIELDS = ("positions", "normals", "uvs", "faces")
+# 扩展名 -> 文件类型
+FILE_KINDS = {".mesh": "mesh", ".anim": "anim", ".skel": "skel"}
+# .mesh 布局名称, auto 表示按文件内容推断
+LAYOUT_NAMES = ("auto",) + tuple(engine.LAYOUTS)
+
+
+def file_kind(filepath: str) -> str:
+    """按扩展名判断文件类型, 不支持时返回空字符串"""
+    return FILE_KINDS.get(os.path.splitext(filepath)[1].lower(), "")
+
+
+def memory_key(filepath: str, layout_name: str = "auto") -> tuple:
+    """进程内缓存键, 布局只对 .mesh 文件有意义"""
+    return MemoryCache.key(filepath, layout_name if file_kind(filepath) == "mesh" else "")
+
+
+def load_file(
+    filepath: str,
+    layout_name: str = "auto",
+    use_index: bool = True,
+    workers: int = 1,
+    cache: Optional[DiskCache] = None,
+    memory: Optional[MemoryCache] = None,
+    profile: Profiler = NULL,
+) -> Tuple[str, List[Any], Dict[str, Any]]:
+    """解析单个文件, 返回 (文件类型, 元数据, 数组表)
+
+    - mesh: 元数据为 [(名称, 贴图路径)], 数组键为 "<序号>.<字段>"
+    - anim: 元数据为顶点组名称, 数组键为顶点组名称
+    - skel: 元数据为骨骼名称, 数组为 levels 和 transforms
+
+    传入 memory 时先查找进程内缓存; 传入 cache 时再按文件内容查找磁盘缓存,
+    未命中时解析并写入缓存。返回的数组可能被缓存共用, 调用方不应修改。
+    传入 profile 时记录各阶段的耗时。
+    """
+    kind = file_kind(filepath)
+    if memory is None or not kind:
+        return _load_file(filepath, layout_name, use_index, workers, cache, profile)
+
+    key = memory_key(filepath, layout_name)
+    with profile.stage("cache"):
+        result = memory.get(key)
+    if result is None:
+        result = _load_file(filepath, layout_name, use_index, workers, cache, profile)
+        # 解析失败 (没有数据) 时不写入缓存
+        if result[2]:
+            with profile.stage("cache"):
+                memory.put(key, result)
+    return result
+
+
+def _load_file(
+    filepath: str,
+    layout_name: str,
+    use_index: bool,
+    workers: int,
+    cache: Optional[DiskCache],
+    profile: Profiler = NULL,
+) -> Tuple[str, List[Any], Dict[str, Any]]:
+    """查找磁盘缓存或解析文件"""
+    kind = file_kind(filepath)
+    if cache is None or not kind:
+        return parse_file(filepath, layout_name, use_index, workers, profile)
+
+    # .anim 按文件名查找解析终点, 同样内容不同文件名的结果可能不同
+    name = os.path.splitext(os.path.basename(filepath))[0] if kind == "anim" else ""
+    with tools.open_buffer(filepath, profile) as data, profile.stage("cache", len(data)):
+        key = cache.key(data, kind, layout_name if kind == "mesh" else "", name)
+    with profile.stage("cache"):
+        cached = cache.load(key)
+    if cached is not None:
+        return (kind,) + cached
+
+    kind, meta, arrays = parse_file(filepath, layout_name, use_index, workers, profile)
+    # 解析失败 (没有数据) 时不写入缓存
+    if arrays:
+        with profile.stage("cache"):
+            cache.store(key, kind, meta, arrays)
+    return kind, meta, arrays
+
+
+def parse_file(
+    filepath: str,
+    layout_name: str = "auto",
+    use_index: bool = True,
+    workers: int = 1,
+    profile: Profiler = NULL,
+) -> Tuple[str, List[Any], Dict[str, Any]]:
+    """解析单个文件 (不使用缓存), 返回值同 load_file"""
+    kind = file_kind(filepath)
+    name = os.path.splitext(os.path.basename(filepath))[0]
+
+    if kind == "anim":
+        with tools.open_buffer(filepath, profile) as data, profile.stage("anim", len(data)):
+            arrays = anim_utils.parse_anim_file(data, name)
+        profile.add("anim", items=sum(len(frames) for frames in arrays.values()), calls=0)
+        return kind, list(arrays), arrays
+
+    if kind == "skel":
+        with tools.open_buffer(filepath, profile) as data, profile.stage("skel", len(data)):
+            names, levels, transforms = skel_utils.parse_skel(data)
+        profile.add("skel", items=len(names), calls=0)
+        return kind, names, {"levels": levels, "transforms": transforms}
+
+    if kind == "mesh":
+        with tools.open_buffer(filepath, profile) as data:
+            if layout_name == "auto":
+                with profile.stage("scan"):
+                    layout = engine.detect_layout(data)
+            else:
+                layout = engine.LAYOUTS[layout_name]
+            if layout is not engine.MAP:
+                chunks = engine.parse_mesh(data, layout, workers, profile)
+        # 地图文件使用分块索引
+        if layout is engine.MAP:
+            chunks = MeshFile(
+                filepath, use_index=use_index, workers=workers, profile=profile
+            ).read()
+
+        meta = [(chunk.name, chunk.colormap_path) for chunk in chunks]
+        arrays = {
+            f"{index}.{field}": getattr(chunk, field)
+            for index, chunk in enumerate(chunks)
+            for field in MESH_FIELDS
+        }
+        return kind, meta, arrays
+
+    raise ValueError(f"不支持的文件类型: {filepath}")
+
+
+def mesh_chunks(meta: List[Any], arrays: Dict[str, Any]) -> List[engine.MeshChunk]:
+    """从元数据和数组表重建网格块"""
+    return [
+        engine.MeshChunk(
+            name=name,
+            colormap_path=colormap_path,
+            **{field: arrays[f"{index}.{field}"] for field in MESH_FIELDS},
+        )
+        for index, (name, colormap_path) in enumerate(meta)
+    ]
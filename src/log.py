@@ -1,18 +1,151 @@
 # log.py
+"""
+PMT 日志。
+
+默认只输出 WARNING 及以上, 调试级别在插件设置或命令行 -v 中开启。
+解析循环中的调试输出用 tracing() 的结果保护, 关闭时只有一次布尔判断::
+
+    trace = tracing()
+    for ...:
+        if trace:
+            log.debug("偏移量 %#x", position)
+
+环形缓冲模式在内存中保留最近的日志 (包括 VERBOSE 级别的调用栈),
+出现 ERROR 时写到文件, 也可以随时用 dump() 导出。
+"""
+
 import logging
+import os
+import tempfile
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+# 常量定义
+# 比 DEBUG 更详细: 可恢复错误的调用栈
+VERBOSE = 5
+logging.addLevelName(VERBOSE, "VERBOSE")
+LEVELS = {
+    "ERROR": logging.ERROR,
+    "WARNING": logging.WARNING,
+    "INFO": logging.INFO,
+    "DEBUG": logging.DEBUG,
+    "VERBOSE": VERBOSE,
+}
+DEFAULT_LEVEL = "WARNING"
+FORMAT = "%(name)s.%(levelname)s: %(message)s"
+RING_FORMAT = "%(asctime)s %(threadName)s %(name)s.%(levelname)s: %(message)s"
+DEFAULT_RING_SIZE = 10000
+DUMP_PREFIX = "pmt-log-"
+
+
+class RingBufferHandler(logging.Handler):
+    """在内存中保留最近的日志, 出现 ERROR 时写到 directory"""
+
+    def __init__(self, capacity: int = DEFAULT_RING_SIZE, directory: str = ""):
+        super().__init__(VERBOSE)
+        self.setFormatter(logging.Formatter(RING_FORMAT))
+        # 保存格式化后的文本, 不让日志记录引用调用栈中的对象
+        self.lines: deque = deque(maxlen=capacity)
+        self.directory = directory
+        self._dump_lock = threading.Lock()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            self.lines.append(self.format(record))
+        except Exception:
+            self.handleError(record)
+            return
+        if record.levelno >= logging.ERROR:
+            self.dump()
+
+    def dump(self, path: str = "") -> str:
+        """写出缓冲区内容, 返回文件路径; 写入失败时返回空字符串"""
+        if not path:
+            directory = self.directory or os.path.join(
+                tempfile.gettempdir(), "pde_model_tools"
+            )
+            name = time.strftime("%Y%m%d-%H%M%S")
+            path = os.path.join(directory, f"{DUMP_PREFIX}{name}-{os.getpid()}.log")
+        with self._dump_lock:
+            lines = list(self.lines)
+            try:
+                os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write("\n".join(lines))
+                    f.write("\n")
+            except OSError:
+                return ""
+        return path
 
 
 def setup_logger() -> logging.Logger:
     """配置日志"""
     logger = logging.getLogger("PMT")
     if not logger.hasHandlers():
-        logger.setLevel(logging.DEBUG)
-        # logger.setLevel(logging.INFO)
+        logger.setLevel(LEVELS[DEFAULT_LEVEL])
         handler = logging.StreamHandler()
-        handler.setFormatter(logging.Formatter("%(name)s.%(levelname)s: %(message)s"))
+        handler.setFormatter(logging.Formatter(FORMAT))
         logger.addHandler(handler)
     return logger
 
 
 log: logging.Logger = setup_logger()
 """ PMT 日志实例 """
+
+_ring: Optional[RingBufferHandler] = None
+
+
+def configure(
+    level: str = DEFAULT_LEVEL, ring_size: int = 0, dump_directory: str = ""
+) -> None:
+    """设置输出级别; ring_size 大于 0 时启用环形缓冲, 并记录所有级别"""
+    global _ring
+
+    levelno = LEVELS[level]
+    for handler in log.handlers:
+        if not isinstance(handler, RingBufferHandler):
+            handler.setLevel(levelno)
+
+    if ring_size > 0:
+        if _ring is None or _ring.lines.maxlen != ring_size:
+            ring = RingBufferHandler(ring_size, dump_directory)
+            if _ring is not None:
+                ring.lines.extend(_ring.lines)
+                log.removeHandler(_ring)
+            _ring = ring
+            log.addHandler(_ring)
+        _ring.directory = dump_directory
+        levelno = VERBOSE
+    elif _ring is not None:
+        log.removeHandler(_ring)
+        _ring = None
+
+    log.setLevel(levelno)
+
+
+def set_level(level: str) -> None:
+    """只修改输出级别, 保留环形缓冲设置"""
+    if _ring is None:
+        configure(level)
+    else:
+        configure(level, _ring.lines.maxlen, _ring.directory)
+
+
+def tracing() -> bool:
+    """是否输出调试日志, 在循环外调用一次"""
+    return log.isEnabledFor(logging.DEBUG)
+
+
+def trace_exc(message: str = "调用栈:") -> None:
+    """在 except 块中调用: 只在 VERBOSE 级别记录当前异常的调用栈"""
+    if log.isEnabledFor(VERBOSE):
+        log.log(VERBOSE, message, exc_info=True)
+
+
+def dump(path: str = "") -> str:
+    """导出环形缓冲, 未启用时返回空字符串"""
+    if _ring is None:
+        return ""
+    return _ring.dump(path)
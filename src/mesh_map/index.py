@@ -0,0 +1,161 @@
+"""
+mesh_map.index
+~~~~~~~~~~~~~
+
+地图网格的分块索引文件 (.pmtidx)。
+
+首次导入时记录每个网格块的头部偏移、顶点块范围、面块范围、
+block_size 和贴图路径; 之后的导入直接按索引定位每个网格块,
+跳过头部扫描和 ColorMap 查找。索引通过文件大小、修改时间和
+内容哈希校验, 任一不一致即视为失效; 条目必须恰好占满索引文件,
+且每个网格块的范围都在网格文件之内, 否则视为损坏并重新扫描。
+"""
+
+import hashlib
+import os
+import struct
+from typing import List, Optional
+
+from ..engine import HEADER_SIZE, MeshChunk
+from ..log import log
+
+# 常量定义
+INDEX_SUFFIX = ".pmtidx"
+INDEX_MAGIC = b"PMTI"
+INDEX_VERSION = 2
+HASH_SIZE = 16
+
+# 魔数, 版本, 文件大小, 修改时间(ns), 内容哈希, 网格块数量
+INDEX_HEADER = struct.Struct(f"<4sIQq{HASH_SIZE}sI")
+# 头部偏移, 网格数量, 顶点数量, 顶点字节数, block_size, 面起始, 面字节数, 路径长度
+INDEX_ENTRY = struct.Struct("<QIIIIQIH")
+
+
+def index_path(filepath: str) -> str:
+    """索引文件路径"""
+    return filepath + INDEX_SUFFIX
+
+
+def content_hash(data: bytes) -> bytes:
+    """文件内容哈希"""
+    return hashlib.blake2b(data, digest_size=HASH_SIZE).digest()
+
+
+def save_index(filepath: str, data: bytes, entries: List[MeshChunk]) -> bool:
+    """写入索引文件, 失败时仅记录日志"""
+    try:
+        stat = os.stat(filepath)
+        parts = [
+            INDEX_HEADER.pack(
+                INDEX_MAGIC,
+                INDEX_VERSION,
+                stat.st_size,
+                stat.st_mtime_ns,
+                content_hash(data),
+                len(entries),
+            )
+        ]
+        for entry in entries:
+            path = entry.colormap_path.encode("utf-8")
+            parts.append(
+                INDEX_ENTRY.pack(
+                    entry.header_offset,
+                    entry.total_count,
+                    entry.vertex_count,
+                    entry.byte_size,
+                    entry.block_size,
+                    entry.faces_start,
+                    entry.faces_size,
+                    len(path),
+                )
+            )
+            parts.append(path)
+
+        with open(index_path(filepath), "wb") as f:
+            f.write(b"".join(parts))
+
+        log.debug("> 写入索引: %s 个网格块", len(entries))
+        return True
+
+    except (OSError, struct.error) as e:
+        log.debug("! 写入索引失败: %s", e)
+        return False
+
+
+def check_entry(entry: MeshChunk, size: int) -> None:
+    """校验网格块范围, 超出 size 字节的文件或前后不一致时抛出 ValueError"""
+    if entry.vertex_count == 0 or entry.block_size != entry.byte_size // entry.vertex_count:
+        raise ValueError(f"顶点数量或 block_size 无效: {entry.header_offset:#x}")
+    if entry.faces_start != entry.vertex_end + 0x4:
+        raise ValueError(f"面块位置与顶点块不一致: {entry.header_offset:#x}")
+    if entry.header_offset + HEADER_SIZE > size or entry.faces_end > size:
+        raise ValueError(f"网格块超出文件范围: {entry.faces_end:#x} > {size:#x}")
+
+
+def load_index(filepath: str, data: Optional[bytes] = None) -> Optional[List[MeshChunk]]:
+    """读取并校验索引文件, 无效时返回 None
+
+    传入 data 时同时校验内容哈希。
+    """
+    try:
+        with open(index_path(filepath), "rb") as f:
+            raw = f.read()
+        stat = os.stat(filepath)
+    except OSError:
+        return None
+
+    try:
+        magic, version, size, mtime_ns, digest, count = INDEX_HEADER.unpack_from(raw)
+        if magic != INDEX_MAGIC or version != INDEX_VERSION:
+            log.debug("! 索引版本不匹配")
+            return None
+        if size != stat.st_size or mtime_ns != stat.st_mtime_ns:
+            log.debug("! 索引已过期: 文件大小或修改时间不一致")
+            return None
+        if data is not None and digest != content_hash(data):
+            log.debug("! 索引已过期: 内容哈希不一致")
+            return None
+
+        # 网格块范围以实际读取的数据为准
+        data_size = len(data) if data is not None else size
+        entries = []
+        position = INDEX_HEADER.size
+        for _ in range(count):
+            (
+                header_offset,
+                total_count,
+                vertex_count,
+                byte_size,
+                block_size,
+                faces_start,
+                faces_size,
+                path_length,
+            ) = INDEX_ENTRY.unpack_from(raw, position)
+            position += INDEX_ENTRY.size
+            if position + path_length > len(raw):
+                raise ValueError("贴图路径超出索引文件")
+            path = raw[position : position + path_length].decode("utf-8")
+            position += path_length
+            entries.append(
+                MeshChunk(
+                    header_offset=header_offset,
+                    total_count=total_count,
+                    vertex_count=vertex_count,
+                    byte_size=byte_size,
+                    block_size=block_size,
+                    faces_start=faces_start,
+                    faces_size=faces_size,
+                    colormap_path=path,
+                )
+            )
+            check_entry(entries[-1], data_size)
+
+        if position != len(raw):
+            raise ValueError(f"索引条目长度不一致: {position} != {len(raw)}")
+
+        log.debug("> 读取索引: %s 个网格块", len(entries))
+        return entries
+
+    except (struct.error, UnicodeDecodeError, ValueError) as e:
+        log.debug("! 索引文件损坏: %s", e)
+        return None
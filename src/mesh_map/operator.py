@@ -13,16 +13,19 @@ mesh_map.operator
 import os
 import math
 import bpy
-from typing import Set
+from typing import TYPE_CHECKING, Set
 from bpy_extras.io_utils import ImportHelper
-from bpy.props import StringProperty
+from bpy.props import BoolProperty, IntProperty, StringProperty
 from bpy.types import Operator
-from . import utils
+from .. import preferences
 from ..log import log
 
+if TYPE_CHECKING:
+    from .. import engine
+    from ..profiler import Profiler
+
 # 常量定义
 ROTATION_X = math.radians(90)
-DEFAULT_UV_LAYER = "UVMap"
 COLORMAP_NODE_NAME = "Colormap"
 BSDF_NODE_NAME = "Principled BSDF"
 
@@ -30,12 +33,13 @@ BSDF_NODE_NAME = "Principled BSDF"
 class MeshImporter:
     """网格导入器"""
 
-    def __init__(self, context: bpy.types.Context):
+    def __init__(self, context: bpy.types.Context, profile: "Profiler"):
         self.context = context
+        self.profile = profile
         self._processed_materials: Set[str] = set()
 
     def create_mesh_object(
-        self, mesh_data: utils.MeshData, base_name: str, index: int
+        self, chunk: "engine.MeshChunk", base_name: str, index: int
     ) -> bpy.types.Object:
         """创建网格对象"""
         # 创建网格
@@ -47,53 +51,30 @@ class MeshImporter:
         self.context.collection.objects.link(obj)
 
         # 构建几何体
-        self._build_geometry(mesh, mesh_data)
+        self._build_geometry(mesh, chunk)
 
         # 设置变换
         self._setup_transform(obj)
 
         # 设置材质
-        if mesh_data.colormap.name:
-            self._setup_material(obj, mesh_data.colormap.name)
+        if chunk.colormap_name:
+            with self.profile.stage("materials"):
+                self._setup_material(obj, chunk.colormap_name)
 
         return obj
 
-    def _build_geometry(self, mesh: bpy.types.Mesh, mesh_data: utils.MeshData) -> None:
+    def _build_geometry(self, mesh: bpy.types.Mesh, chunk: "engine.MeshChunk") -> None:
         """构建网格几何体"""
-        # 创建顶点和面
-        mesh.from_pydata(mesh_data.vertices["data"], [], mesh_data.faces["data"])
-
-        # 创建UV和法向
-        self._create_uvs(mesh, mesh_data.uvs)
-        self._create_normals(mesh, mesh_data.normals)
-
-        # 更新网格
-        mesh.update()
-
-    def _create_uvs(self, mesh: bpy.types.Mesh, uvs: list) -> None:
-        """创建 UV 映射"""
-        uv_layer = mesh.uv_layers.new(name=DEFAULT_UV_LAYER)
-        for poly in mesh.polygons:
-            for loop_idx in poly.loop_indices:
-                vert_idx = mesh.loops[loop_idx].vertex_index
-                if vert_idx >= len(uvs):
-                    # 处理缺少 UV 数据的情况
-                    # log.error(f"顶点索引 {vert_idx} 超出 UV 列表长度 {len(uvs)}")
-                    uv_coord = (0.0, 0.0)  # 默认 UV
-                else:
-                    uv_coord = uvs[vert_idx]
-                uv_layer.data[loop_idx].uv = uv_coord
-
-    def _create_normals(self, mesh: bpy.types.Mesh, normals: list) -> None:
-        loop_normals = []
-        for poly in mesh.polygons:
-            for v in poly.vertices:
-                if v >= len(normals):
-                    loop_normals.append((0.0, 0.0, 1.0))  # Default normal
-                else:
-                    loop_normals.append(normals[v])
-
-        mesh.normals_split_custom_set(loop_normals)
+        from .. import geometry
+
+        geometry.build_mesh(
+            mesh,
+            chunk.positions,
+            chunk.faces,
+            chunk.normals,
+            chunk.uvs,
+            profile=self.profile,
+        )
 
     def _setup_transform(self, obj: bpy.types.Object) -> None:
         """设置对象变换"""
@@ -158,6 +139,20 @@ class ImportMeshMapClass(Operator, ImportHelper):
 
     filename_ext = ".mesh"
     filter_glob: StringProperty(default="*.mesh", options={"HIDDEN"})  # type: ignore
+    use_index: BoolProperty(
+        name="使用分块索引",
+        description="读取或生成 .pmtidx 索引文件, 再次导入时直接定位每个网格块",
+        default=True,
+    )  # type: ignore
+    decode_threads: IntProperty(
+        name="解码线程数",
+        description=(
+            "并行解码网格块的线程数量, 默认 0 表示使用全部 CPU 核心, "
+            "1 表示不使用线程; 网格块少于 8 个时总是直接解码"
+        ),
+        default=0,
+        min=0,
+    )  # type: ignore
 
     def execute(self, context: bpy.types.Context) -> Set[str]:
         try:
@@ -174,28 +169,37 @@ class ImportMeshMapClass(Operator, ImportHelper):
             self.report({"ERROR"}, "文件路径不存在")
             return {"CANCELLED"}
 
+        # 解析模块在首次导入时才加载, 插件注册时只定义操作类
+        from .. import loader
+        from ..profiler import Profiler
+
+        # 获取基础名称
+        base_name = os.path.splitext(os.path.basename(self.filepath))[0]
+        profile = Profiler(base_name)
+
         # 读取网格数据
-        mesh_file = utils.MeshFile(self.filepath)
-        mesh_objects = mesh_file.read()
+        _, meta, arrays = loader.load_file(
+            self.filepath,
+            "map",
+            use_index=self.use_index,
+            workers=self.decode_threads or os.cpu_count() or 1,
+            cache=preferences.disk_cache(),
+            memory=preferences.memory_cache(),
+            profile=profile,
+        )
+        mesh_objects = loader.mesh_chunks(meta, arrays)
 
         if not mesh_objects:
             self.report({"ERROR"}, "未能读取到有效的网格数据")
             return {"CANCELLED"}
 
         # 创建导入器
-        importer = MeshImporter(context)
-
-        # 获取基础名称
-        base_name = os.path.splitext(os.path.basename(self.filepath))[0]
+        importer = MeshImporter(context, profile)
 
         # 处理每个网格对象
-        for idx, mesh_data in enumerate(mesh_objects, 1):
-            if not mesh_data.normals or len(mesh_data.normals) != len(
-                mesh_data.vertices.get("data", [])
-            ):
-                log.error(f"跳过网格 {idx}: 法向数据不匹配")
-                continue
-            importer.create_mesh_object(mesh_data, base_name, idx)
+        for idx, chunk in enumerate(mesh_objects, 1):
+            importer.create_mesh_object(chunk, base_name, idx)
 
         self.report({"INFO"}, f"成功导入 {len(mesh_objects)} 个网格对象")
+        preferences.report_profile(self, profile)
         return {"FINISHED"}
@@ -1,19 +1,17 @@
 # mesh_prop\operator.py
 import math
 import os
-import traceback
 from typing import Set
 
 import bpy
 from bpy_extras.io_utils import ImportHelper
 from bpy.props import StringProperty
 
-from . import utils
-from ..log import log
+from .. import preferences
+from ..log import log, trace_exc
 
 # 常量定义
 ROTATION_X = math.radians(90)
-DEFAULT_UV_LAYER = "UVMap"
 COLORMAP_NODE_NAME = "Colormap"
 BSDF_NODE_NAME = "Principled BSDF"
 
@@ -32,37 +30,44 @@ class ImportMeshPropClass(bpy.types.Operator, ImportHelper):
     _processed_materials: Set[str] = set()
 
     def execute(self, context):
+        from . import utils
+        from .. import geometry
+        from ..profiler import Profiler
+
         try:
             # 检查文件路径
             if not os.path.exists(self.filepath):
                 self.report({"ERROR"}, "文件不存在，请检查路径是否正确")
                 return {"CANCELLED"}
 
-            # 读取二进制文件
-            with open(self.filepath, "rb") as file:
-                data = file.read()
-
             # 获取基础名称
             mesh_name = os.path.splitext(os.path.basename(self.filepath))[0]
+            profile = Profiler(mesh_name)
 
             # 分割网格数据
-            mesh_obj = utils.split_mesh(self, data)
+            mesh_obj = utils.split_mesh(
+                self,
+                self.filepath,
+                preferences.disk_cache(),
+                preferences.memory_cache(),
+                profile,
+            )
 
             # 循环索引
             idx = 0
             # 读取数据块
-            for this_obj in mesh_obj:
+            for chunk in mesh_obj:
                 # 读取顶点数据
-                vertices = this_obj["vertices"]["data"]
+                vertices = chunk.positions
                 # 读取面数据
-                faces = this_obj["faces"]["data"]
+                faces = chunk.faces
                 # 读取法相
-                normals = this_obj["normals"]
+                normals = chunk.normals
                 # 读取UV坐标
-                uvs = this_obj["uvs"]
+                uvs = chunk.uvs
                 # 读取ColorMap
-                colormap = this_obj["colormap"]
-                log.debug("colormap x :%s", colormap.name)
+                colormap_name = chunk.colormap_name
+                log.debug("colormap x :%s", colormap_name)
 
                 # 创建新网格
                 new_mesh = bpy.data.meshes.new(f"{mesh_name}_{idx}")
@@ -71,38 +76,15 @@ class ImportMeshPropClass(bpy.types.Operator, ImportHelper):
                 # 将对象添加到场景中
                 context.collection.objects.link(new_obj)
 
-                # 创建顶点 点, 线, 面
-                new_mesh.from_pydata(vertices, [], faces)
-
-                # 创建UV图层
-                uv_layer = new_mesh.uv_layers.new(name="UVMap")
-
-                # 为每个循环（loop）设置UV坐标
-                for face in new_mesh.polygons:
-                    for loop_idx in face.loop_indices:
-                        # 获取顶点索引
-                        vertex_idx = new_mesh.loops[loop_idx].vertex_index
-                        # 设置UV坐标
-                        uv_layer.data[loop_idx].uv = uvs[vertex_idx]
-
-                # 启用平滑着色
-                new_mesh.shade_smooth()
-
-                # 准备法向数据
-                loop_normals = []
-                for poly in new_mesh.polygons:
-                    for vertex_idx in poly.vertices:
-                        loop_normals.append(normals[vertex_idx])
-
-                # 设置自定义法向
-                new_mesh.normals_split_custom_set(loop_normals)
+                # 批量写入顶点、面、UV、平滑标记和自定义法向
+                geometry.build_mesh(
+                    new_mesh, vertices, faces, normals, uvs, profile=profile
+                )
 
                 # 设置材质
-                if colormap.name:
-                    self._setup_material(new_obj, colormap.name)
-
-                # 更新网格
-                new_mesh.update()
+                if colormap_name:
+                    with profile.stage("materials"):
+                        self._setup_material(new_obj, colormap_name)
 
                 # 设置物体的位置
                 new_obj.location = (0, 0, 0)
@@ -115,10 +97,12 @@ class ImportMeshPropClass(bpy.types.Operator, ImportHelper):
                 idx += 1
 
             self.report({"INFO"}, "模型加载成功")
+            preferences.report_profile(self, profile)
             return {"FINISHED"}
         except Exception as e:
+            log.error("模型加载失败: %s", e)
+            trace_exc()
             self.report({"ERROR"}, f"模型加载失败: {e}")
-            traceback.print_exc()
             return {"CANCELLED"}
 
     def _setup_material(self, obj: bpy.types.Object, colormap_name: str) -> None:
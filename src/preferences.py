@@ -0,0 +1,255 @@
+# preferences.py
+import os
+import sys
+import tempfile
+import time
+from typing import TYPE_CHECKING, Optional
+
+import bpy
+from bpy.props import BoolProperty, EnumProperty, IntProperty, StringProperty
+from bpy.types import AddonPreferences, Operator
+
+from . import log as pmt_log
+
+# 缓存模块 (依赖 numpy) 在首次导入时才加载
+if TYPE_CHECKING:
+    from .cache import DiskCache, MemoryCache
+    from .profiler import Profiler
+
+# 常量定义
+MB = 1024 * 1024
+CACHE_DIR_NAME = "cache"
+LOG_DIR_NAME = "logs"
+PROFILE_DIR_NAME = "profiles"
+
+
+def _update_logging(self, context):
+    apply_logging(self)
+
+
+class PMTPreferences(AddonPreferences):
+    """插件设置"""
+
+    bl_idname = __package__
+
+    use_disk_cache: BoolProperty(
+        name="磁盘缓存",
+        description="缓存解析后的数组, 再次导入相同内容的文件时跳过解析",
+        default=True,
+    )  # type: ignore
+    cache_directory: StringProperty(
+        name="缓存目录",
+        description="留空时使用插件的用户目录",
+        subtype="DIR_PATH",
+        default="",
+    )  # type: ignore
+    cache_size_mb: IntProperty(
+        name="缓存上限 (MB)",
+        description="超过上限时删除最久未使用的条目",
+        default=2048,
+        min=64,
+    )  # type: ignore
+
+    use_memory_cache: BoolProperty(
+        name="内存缓存",
+        description="在当前会话中保留解析结果, 重复导入未修改的文件时跳过读取和解析",
+        default=True,
+    )  # type: ignore
+    memory_cache_mb: IntProperty(
+        name="内存缓存上限 (MB)",
+        description="超过上限时删除最久未使用的条目",
+        default=1024,
+        min=16,
+    )  # type: ignore
+
+    log_level: EnumProperty(
+        name="日志级别",
+        description="输出到控制台的日志级别",
+        items=(
+            ("ERROR", "错误", "只输出错误"),
+            ("WARNING", "警告", "输出警告和错误"),
+            ("INFO", "信息", "输出导入过程的概要"),
+            ("DEBUG", "调试", "输出解析过程的详细信息, 会降低导入速度"),
+            ("VERBOSE", "详细", "另外输出可恢复错误的调用栈"),
+        ),
+        default=pmt_log.DEFAULT_LEVEL,
+        update=_update_logging,
+    )  # type: ignore
+    use_log_buffer: BoolProperty(
+        name="环形日志缓冲",
+        description="在内存中保留最近的全部日志, 出错时写到日志目录; 会降低导入速度",
+        default=False,
+        update=_update_logging,
+    )  # type: ignore
+    log_buffer_size: IntProperty(
+        name="缓冲条数",
+        description="环形缓冲保留的日志条数",
+        default=pmt_log.DEFAULT_RING_SIZE,
+        min=100,
+        update=_update_logging,
+    )  # type: ignore
+
+    write_profile: BoolProperty(
+        name="写出性能数据",
+        description="导入后将各阶段的耗时、字节数和元素数量写成 JSON 文件",
+        default=False,
+    )  # type: ignore
+    profile_directory: StringProperty(
+        name="性能数据目录",
+        description="留空时使用插件的用户目录",
+        subtype="DIR_PATH",
+        default="",
+    )  # type: ignore
+
+    def draw(self, context):
+        """绘制设置面板"""
+        layout = self.layout
+        layout.prop(self, "use_memory_cache")
+        column = layout.column()
+        column.enabled = self.use_memory_cache
+        column.prop(self, "memory_cache_mb")
+        row = layout.row()
+        # 只显示已加载的缓存, 不为绘制界面加载缓存模块
+        cache = sys.modules.get(f"{__package__}.cache")
+        count, total = (
+            (len(cache.memory_cache), cache.memory_cache.total_bytes) if cache else (0, 0)
+        )
+        row.label(text=f"内存缓存: {count} 个文件, {total / MB:.1f} MB")
+        row.operator(ClearCacheClass.bl_idname, text="清空内存缓存").target = "MEMORY"
+
+        layout.prop(self, "use_disk_cache")
+        column = layout.column()
+        column.enabled = self.use_disk_cache
+        column.prop(self, "cache_directory")
+        column.prop(self, "cache_size_mb")
+        column.operator(ClearCacheClass.bl_idname, text="清空磁盘缓存").target = "DISK"
+
+        layout.prop(self, "log_level")
+        layout.prop(self, "use_log_buffer")
+        row = layout.row()
+        row.enabled = self.use_log_buffer
+        row.prop(self, "log_buffer_size")
+        row.operator(DumpLogClass.bl_idname)
+
+        layout.prop(self, "write_profile")
+        column = layout.column()
+        column.enabled = self.write_profile
+        column.prop(self, "profile_directory")
+
+
+class ClearCacheClass(Operator):
+    """清空解析结果缓存"""
+
+    bl_idname = "pmt.clear_cache"
+    bl_label = "清空缓存"
+
+    target: EnumProperty(
+        items=(
+            ("MEMORY", "内存", "清空当前会话的内存缓存"),
+            ("DISK", "磁盘", "删除磁盘缓存目录中的条目"),
+        ),
+        default="MEMORY",
+    )  # type: ignore
+
+    def execute(self, context):
+        from .cache import DiskCache, memory_cache
+
+        if self.target == "MEMORY":
+            count = memory_cache.clear()
+        else:
+            count = DiskCache(cache_directory(get_preferences())).clear()
+        self.report({"INFO"}, f"已清空 {count} 个缓存条目")
+        return {"FINISHED"}
+
+
+class DumpLogClass(Operator):
+    """将环形缓冲中的日志写到日志目录"""
+
+    bl_idname = "pmt.dump_log"
+    bl_label = "导出日志"
+
+    def execute(self, context):
+        path = pmt_log.dump()
+        if not path:
+            self.report({"WARNING"}, "环形日志缓冲未启用或写入失败")
+            return {"CANCELLED"}
+        self.report({"INFO"}, f"日志已写入 {path}")
+        return {"FINISHED"}
+
+
+def get_preferences() -> PMTPreferences:
+    """插件设置"""
+    return bpy.context.preferences.addons[__package__].preferences
+
+
+def cache_directory(prefs: PMTPreferences) -> str:
+    """磁盘缓存目录"""
+    if prefs.cache_directory:
+        return bpy.path.abspath(prefs.cache_directory)
+    return user_directory(CACHE_DIR_NAME)
+
+
+def user_directory(name: str) -> str:
+    """插件用户目录下的子目录"""
+    try:
+        return bpy.utils.extension_path_user(__package__, path=name, create=True)
+    except ValueError:  # 以旧式插件安装时没有扩展用户目录
+        return os.path.join(tempfile.gettempdir(), "pde_model_tools", name)
+
+
+def apply_logging(prefs: Optional[PMTPreferences] = None) -> None:
+    """按插件设置配置日志级别和环形缓冲"""
+    if prefs is None:
+        addon = bpy.context.preferences.addons.get(__package__)
+        if addon is None:
+            return
+        prefs = addon.preferences
+    pmt_log.configure(
+        prefs.log_level,
+        prefs.log_buffer_size if prefs.use_log_buffer else 0,
+        user_directory(LOG_DIR_NAME) if prefs.use_log_buffer else "",
+    )
+
+
+def disk_cache() -> Optional["DiskCache"]:
+    """按插件设置创建磁盘缓存, 未启用时返回 None"""
+    from .cache import DiskCache
+
+    prefs = get_preferences()
+    if not prefs.use_disk_cache:
+        return None
+    return DiskCache(cache_directory(prefs), prefs.cache_size_mb * MB)
+
+
+def memory_cache() -> Optional["MemoryCache"]:
+    """按插件设置返回进程内缓存, 未启用时清空并返回 None"""
+    from .cache import memory_cache as cache
+
+    prefs = get_preferences()
+    if not prefs.use_memory_cache:
+        cache.clear()
+        return None
+    cache.max_bytes = prefs.memory_cache_mb * MB
+    cache.evict()
+    return cache
+
+
+def report_profile(operator: Operator, profile: "Profiler") -> None:
+    """在操作的 report() 中输出各阶段耗时, 按设置写出 JSON 文件"""
+    profile.finish()
+    operator.report({"INFO"}, profile.summary())
+
+    prefs = get_preferences()
+    if not prefs.write_profile:
+        return
+    if prefs.profile_directory:
+        directory = bpy.path.abspath(prefs.profile_directory)
+    else:
+        directory = user_directory(PROFILE_DIR_NAME)
+    name = f"{profile.name or 'import'}-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    try:
+        path = profile.write_json(os.path.join(directory, name))
+    except OSError as e:
+        operator.report({"WARNING"}, f"写入性能数据失败: {e}")
+        return
+    operator.report({"INFO"}, f"性能数据已写入 {path}")
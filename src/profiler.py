@@ -0,0 +1,168 @@
+"""
+profiler
+~~~~~~~~
+
+导入过程的分阶段计时 (不依赖 bpy)。
+
+解析和构建函数接收 profile 参数, 在各阶段中累计耗时、调用次数、
+字节数和元素数量 (顶点、面、网格块等)。默认的 NULL 不做任何记录。
+多线程解码和批量导入时, 解析阶段的耗时为各线程 (进程) 耗时之和,
+可能超过总耗时。
+文件以内存映射打开, "读取文件" 只包含打开和映射, 实际读盘
+发生在首次访问数据的阶段 (通常是查找贴图和解码)。
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Iterator
+
+# 常量定义
+MB = 1024 * 1024
+# 阶段名称 -> 显示名称, 输出时按此顺序排列
+STAGES = {
+    "read": "读取文件",
+    "cache": "查找缓存",
+    "index": "分块索引",
+    "scan": "定位头部",
+    "colormap": "查找贴图",
+    "vertices": "解码顶点",
+    "faces": "解码面",
+    "anim": "解析动画",
+    "skel": "解析骨骼",
+    "transfer": "进程间传输",
+    "mesh": "创建网格",
+    "attributes": "UV/法向",
+    "materials": "创建材质",
+    "keyframes": "写入关键帧",
+    "armature": "创建骨架",
+}
+
+
+@dataclass
+class Stage:
+    """单个阶段的累计数据"""
+
+    seconds: float = 0.0
+    calls: int = 0
+    bytes: int = 0
+    items: int = 0
+
+
+class Profiler:
+    """各阶段的耗时和数据量"""
+
+    def __init__(self, name: str = ""):
+        self.name = name
+        self.stages: Dict[str, Stage] = {}
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name: str, nbytes: int = 0, items: int = 0) -> Iterator[None]:
+        """计时一个阶段"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start, nbytes, items)
+
+    def add(
+        self,
+        name: str,
+        seconds: float = 0.0,
+        nbytes: int = 0,
+        items: int = 0,
+        calls: int = 1,
+    ) -> None:
+        """累计阶段数据 (线程安全)"""
+        with self._lock:
+            stage = self.stages.get(name)
+            if stage is None:
+                stage = self.stages[name] = Stage()
+            stage.seconds += seconds
+            stage.calls += calls
+            stage.bytes += nbytes
+            stage.items += items
+
+    def merge(self, stages: Dict[str, Dict[str, Any]]) -> None:
+        """合并其他进程的 to_dict()["stages"]"""
+        with self._lock:
+            for name, values in stages.items():
+                stage = self.stages.setdefault(name, Stage())
+                stage.seconds += values["seconds"]
+                stage.calls += values["calls"]
+                stage.bytes += values["bytes"]
+                stage.items += values["items"]
+
+    def finish(self) -> "Profiler":
+        """记录总耗时"""
+        self.elapsed = time.perf_counter() - self.started
+        return self
+
+    def ordered(self) -> Iterator[tuple]:
+        """按 STAGES 顺序返回 (名称, 阶段), 未知阶段排在最后"""
+        order = list(STAGES)
+        return iter(
+            sorted(
+                self.stages.items(),
+                key=lambda item: order.index(item[0]) if item[0] in order else len(order),
+            )
+        )
+
+    def summary(self) -> str:
+        """单行摘要, 用于操作的 report()"""
+        parts = []
+        for name, stage in self.ordered():
+            text = f"{STAGES.get(name, name)} {stage.seconds * 1000:.1f} ms"
+            if stage.bytes:
+                text += f" {stage.bytes / MB:.2f} MB"
+            if stage.items:
+                text += f" ×{stage.items}"
+            parts.append(text)
+        parts.append(f"总计 {self.elapsed * 1000:.1f} ms")
+        return " | ".join(parts)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "elapsed": self.elapsed,
+            "stages": {name: asdict(stage) for name, stage in self.ordered()},
+        }
+
+    def write_json(self, path: str) -> str:
+        """写出 JSON 文件, 返回路径"""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+        return path
+
+
+class NullProfiler(Profiler):
+    """不做任何记录"""
+
+    _context = nullcontext()
+
+    def stage(self, name: str, nbytes: int = 0, items: int = 0):
+        return self._context
+
+    def add(
+        self,
+        name: str,
+        seconds: float = 0.0,
+        nbytes: int = 0,
+        items: int = 0,
+        calls: int = 1,
+    ) -> None:
+        pass
+
+    def merge(self, stages: Dict[str, Dict[str, Any]]) -> None:
+        pass
+
+
+# 默认参数, 不计时
+NULL = NullProfiler()
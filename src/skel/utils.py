@@ -2,58 +2,95 @@
 import math
 import struct
 
-from mathutils import Vector
-
-from ..log import log
-
-
-def read_bone_info(file):
-    """读取骨骼名称和层级"""
-    try:
-        # 骨骼名称长度
-        name_length = struct.unpack("<I", file.read(4))[0]
-        log.debug("骨骼名称长度: %s", name_length)
-        # 骨骼名称
-        name = file.read(name_length).decode("ascii")
-        log.debug("骨骼名称: %s", name)
-        # 骨骼层级
-        level = struct.unpack("<I", file.read(4))[0]
-
-        log.debug("骨骼信息: %s %s", name, level)
-
-        # 返回骨骼名称和层级
-        return name, level
-    except struct.error as e:
-        log.debug("读取骨骼信息失败: %s", e)
-        return None
-
-
-def read_bone_transform(file):
-    """读取骨骼变换数据"""
-    try:
-        # 头部坐标
-        head = struct.unpack("<fff", file.read(12))
-        # 尾部坐标
-        tail = struct.unpack("<fff", file.read(12))
-        # 结束标记？
-        end_tag = struct.unpack("<f", file.read(4))[0]
-
-        log.debug("Head: %s Tail: %s End tag: %s", head, tail, end_tag)
-
-        return head, tail, end_tag
-    except struct.error as e:
-        log.debug("读取骨骼变换数据失败: %s", e)
-        return None
-
-
-def validate_file(file):
+try:
+    import numpy as np
+except ImportError:  # Blender 自带 NumPy，仅在外部环境中可能缺失
+    np = None
+
+try:
+    from mathutils import Vector
+    from mathutils.kdtree import KDTree
+except ImportError:  # 在 Blender 之外只使用解析函数
+    Vector = KDTree = None
+
+from ..log import log, tracing
+
+# 常量定义
+SKEL_MAGIC = b"\xFF\xFF\xFF\xFF\x00\x00\x00\x00\x00\x00\x00\x00"
+MAGIC_SIZE = len(SKEL_MAGIC)
+UINT = struct.Struct("<I")
+# 头部坐标, 尾部坐标, 结束标记
+TRANSFORM = struct.Struct("<3f3ff")
+TRANSFORM_FLOATS = TRANSFORM.size // 4
+TRANSFORM_END_TAG_OFFSET = TRANSFORM.size - 1
+TRANSFORM_END_TAG = 0x3F
+# KDTree 按 float32 计算距离, 查找半径放宽后再按 float64 精确比较
+TIE_TOLERANCE = 1e-5
+# 不使用 KDTree 时每批计算的 (子骨骼 × 父骨骼) 距离数量
+DISTANCE_BATCH = 1 << 20
+
+
+def validate_file(data):
     """验证文件是否是skel文件"""
-    try:
-        header = file.read(12)
-        return header == b"\xFF\xFF\xFF\xFF\x00\x00\x00\x00\x00\x00\x00\x00"
-    except Exception as e:
-        log.debug("文件验证失败: %s", e)
-        return False
+    return bytes(data[:MAGIC_SIZE]) == SKEL_MAGIC
+
+
+def parse_skel(data):
+    """解析 skel 数据, 返回 (骨骼名称列表, 层级数组, 变换数组)
+
+    变换数组为 (骨骼数, 7) float32: 头部坐标 3f, 尾部坐标 3f, 结束标记 1f。
+    """
+    if not validate_file(data):
+        raise ValueError("无效的文件格式")
+
+    size = len(data)
+    position = MAGIC_SIZE
+    names = []
+    levels = []
+
+    # 读取骨骼名称和层级关系
+    while position + UINT.size <= size:
+        (name_length,) = UINT.unpack_from(data, position)
+        name_end = position + UINT.size + name_length
+        if name_end + UINT.size > size:
+            log.debug("读取骨骼信息失败: 数据不足")
+            break
+
+        try:
+            name = bytes(data[position + UINT.size : name_end]).decode("ascii")
+        except UnicodeDecodeError as e:
+            raise ValueError(f"骨骼名称解析失败: {e}") from e
+        (level,) = UINT.unpack_from(data, name_end)
+        names.append(name)
+        levels.append(level)
+        position = name_end + UINT.size
+
+        # 检查是否到达骨骼名称部分的结尾
+        # 变换数据块以 0 开始, 第 28 个字节为结束标记 0x3F
+        end_tag = position + TRANSFORM_END_TAG_OFFSET
+        if end_tag >= size:
+            break
+        (next_name_length,) = UINT.unpack_from(data, position)
+        if next_name_length == 0 and data[end_tag] == TRANSFORM_END_TAG:
+            break
+
+    log.debug("读取骨骼信息结束: %s", len(names))
+
+    # 读取骨骼变换数据, 数据不足时只取完整的部分
+    count = min(len(names), (size - position) // TRANSFORM.size)
+    if np is not None:
+        transforms = np.ndarray(
+            (count, TRANSFORM_FLOATS), dtype="<f4", buffer=data, offset=position
+        ).copy()
+        levels = np.array(levels, dtype=np.uint32)
+    else:
+        transforms = [
+            TRANSFORM.unpack_from(data, position + i * TRANSFORM.size)
+            for i in range(count)
+        ]
+    log.debug("读取骨骼变换数据结束: %s", count)
+
+    return names, levels, transforms
 
 
 def convert_coordinates(coords):
@@ -76,12 +113,51 @@ def calculate_bone_roll(bone):
 
 def print_hierarchy(bones):
     """打印骨骼层级结构"""
+    if not tracing():
+        return
     log.debug("骨骼层级结构:")
     for name, level in bones:
         # indent = "  " * (level - 1)
         log.debug("%s %s", name, level)
 
 
+def find_parents(heads, levels, kdtree=None):
+    """每个骨骼的父骨骼序号, 没有父骨骼时为 -1 (不依赖 bpy)
+
+    父骨骼为上一层级中头部离本骨骼头部最近的骨骼, 距离相同时取序号最小的,
+    与逐个比较取最小值的结果相同。传入 kdtree (mathutils.kdtree.KDTree)
+    时每个层级建一棵树筛选候选, 否则按批计算全部距离。
+    """
+    heads = np.asarray(heads, dtype=np.float64).reshape(-1, 3)
+    by_level = {}
+    for index, level in enumerate(levels):
+        by_level.setdefault(int(level), []).append(index)
+
+    parents = [-1] * len(heads)
+    for level, children in by_level.items():
+        candidates = by_level.get(level - 1)
+        if level <= 1 or not candidates:
+            continue
+        candidate_heads = heads[candidates]
+
+        if kdtree is None:
+            batch = max(1, DISTANCE_BATCH // len(candidates))
+            for start in range(0, len(children), batch):
+                chunk = children[start : start + batch]
+                offsets = heads[chunk][:, None, :] - candidate_heads[None, :, :]
+                # argmin 在距离相同时返回第一个
+                nearest = (offsets**2).sum(axis=2).argmin(axis=1)
+                for child, i in zip(chunk, nearest.tolist()):
+                    parents[child] = candidates[i]
+        else:
+            tree = build_kdtree(candidate_heads, kdtree)
+            for child in children:
+                nearest = find_nearest(tree, heads[child], candidate_heads)
+                parents[child] = candidates[nearest]
+
+    return parents
+
+
 def create_bone_chain(edit_bones, bones, transforms):
     """创建骨骼链"""
     bone_dict = {}
@@ -90,11 +166,11 @@ def create_bone_chain(edit_bones, bones, transforms):
     for i, (name, level) in enumerate(bones):
         if i < len(transforms):
             bone = edit_bones.new(name)
-            head, tail, end_tag = transforms[i]
+            transform = transforms[i]
 
             # 转换坐标
-            head = convert_coordinates(head)
-            tail = convert_coordinates(tail)
+            head = convert_coordinates(transform[0:3])
+            tail = convert_coordinates(transform[3:6])
 
             # 设置骨骼位置
             bone.head = Vector(head)
@@ -104,29 +180,47 @@ def create_bone_chain(edit_bones, bones, transforms):
             # bone.roll = calculate_bone_roll(bone)
 
             # 存储骨骼信息
-            bone_dict[name] = {"bone": bone, "level": level}
+            bone_dict[name] = {"bone": bone, "level": level, "head": head}
+
+    # 查找最近的父骨骼, 每个层级建一棵 KDTree
+    entries = list(bone_dict.values())
+    parents = find_parents(
+        [data["head"] for data in entries], [data["level"] for data in entries], KDTree
+    )
 
     # 设置父子关系
-    for name, data in bone_dict.items():
+    for data, parent in zip(entries, parents):
+        if parent < 0:
+            continue
         bone = data["bone"]
-        level = data["level"]
-
-        if level > 1:
-            # 查找最近的父骨骼
-            parent_level = level - 1
-            potential_parents = [
-                (n, d) for n, d in bone_dict.items() if d["level"] == parent_level
-            ]
-
-            if potential_parents:
-                # 选择最近的父骨骼
-                closest_parent = min(
-                    potential_parents,
-                    key=lambda x: (x[1]["bone"].head - bone.head).length,
-                )
-                bone.parent = closest_parent[1]["bone"]
-                # 设置父骨骼的尾为子骨骼的头
-                closest_parent[1]["bone"].tail = bone.head
+        closest_parent = entries[parent]["bone"]
+        bone.parent = closest_parent
+        # 设置父骨骼的尾为子骨骼的头
+        closest_parent.tail = bone.head
+
+
+def build_kdtree(points, kdtree):
+    """用坐标建立 KDTree, 序号为 points 中的位置"""
+    tree = kdtree(len(points))
+    for i, co in enumerate(points):
+        tree.insert(tuple(co), i)
+    tree.balance()
+    return tree
+
+
+def find_nearest(tree, co, points):
+    """最近点在 points 中的序号, 距离相同时取序号最小的
+
+    KDTree 的距离为 float32, 直接用 find 返回的距离做 find_range 半径
+    可能漏掉距离相同 (例如头部重合) 的点; 放宽半径取出候选后,
+    再按 float64 平方距离比较。
+    """
+    _, index, distance = tree.find(tuple(co))
+    radius = distance * (1 + TIE_TOLERANCE) + TIE_TOLERANCE
+    found = sorted({index, *(i for _, i, _ in tree.find_range(tuple(co), radius))})
+    distances = ((points[found] - co) ** 2).sum(axis=1)
+    # argmin 在距离相同时返回第一个, found 已按序号排列
+    return found[int(distances.argmin())]
 
 
 def add_bone_constraints(armature_obj):
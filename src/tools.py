@@ -1,28 +1,283 @@
 # tools.py
+import bisect
+import contextlib
+import mmap
+import os
+import re
 import struct
+import time
+
+try:
+    import numpy as np
+except ImportError:  # Blender 自带 NumPy，仅在外部环境中可能缺失
+    np = None
+
+from .log import log
+from .profiler import NULL, Profiler
+
+
+@contextlib.contextmanager
+def open_buffer(filepath: str, profile: Profiler = NULL):
+    """以内存映射方式打开文件, 返回只读 memoryview
+
+    切片不会复制数据; 离开 with 块时立即释放映射,
+    解析结果中不能保留指向该缓冲区的视图。
+    """
+    start = time.perf_counter()
+    with open(filepath, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            profile.add("read", time.perf_counter() - start, 0, 1)
+            yield memoryview(b"")
+            return
+        mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    profile.add("read", time.perf_counter() - start, size, 1)
+
+    view = memoryview(mapping)
+    try:
+        yield view
+    finally:
+        try:
+            view.release()
+            mapping.close()
+        except BufferError:
+            log.debug("! 映射仍被引用, 交由垃圾回收释放: %s", filepath)
+
+
+def find_bytes(data: bytes, pattern: bytes, start: int = 0) -> int:
+    """在 bytes 或 memoryview 中查找 pattern, 找不到返回 -1"""
+    match = re.compile(re.escape(pattern)).search(data, start)
+    return match.start() if match else -1
+
+
+HALF_STRUCT = struct.Struct("<H")
+_half_table = None
+
+
+def _decode_half(value: int) -> float:
+    """解码一个半精度浮点数的位模式 (IEEE 754-2008)"""
+    if value == 0:
+        return 0.0  # 零值直接返回
+
+    sign = -1 if (value & 0x8000) else 1
+    exponent = (value >> 10) & 0x1F
+    mantissa = value & 0x3FF
+
+    if exponent == 0:
+        # 非正规数或零
+        return sign * (mantissa / (2**10)) * 2**-14
+    elif exponent == 31:
+        # 无穷大或 NaN
+        return float("inf") if mantissa == 0 else float("nan")
+    else:
+        # 正规数
+        return sign * (1 + mantissa / (2**10)) * 2 ** (exponent - 15)
+
+
+def _half_lookup_table() -> list:
+    """65536 项半精度查找表 (无 NumPy 时使用, 首次调用时生成)"""
+    global _half_table
+    if _half_table is None:
+        _half_table = [_decode_half(value) for value in range(0x10000)]
+    return _half_table
+
+
+def _half_to_float32(values):
+    """float16 数组转 float32 (与 _decode_half 一致, 负无穷按正无穷处理)"""
+    result = values.astype(np.float32)
+    result[np.isneginf(result)] = np.inf
+    return result
+
+
+def read_half_floats(data: bytes, offset: int, count: int, stride: int = 2):
+    """批量读取半精度浮点数 (IEEE 754-2008)
+
+    从 offset 开始读取 count 个值, 相邻两个值相隔 stride 字节。
+    返回 float32 数组; 没有 NumPy 时通过查找表返回 float 列表。
+    非正规数、无穷大和 NaN 的处理与逐个解码一致。
+    """
+    end = offset + (count - 1) * stride + 2 if count > 0 else offset
+    if offset < 0 or count < 0 or end > len(data):
+        raise ValueError(f"无法解包半精度浮点数: 数据越界 {end} > {len(data)}")
+
+    if np is not None:
+        values = np.ndarray(
+            (count,), dtype="<f2", buffer=data, offset=offset, strides=(stride,)
+        )
+        return _half_to_float32(values)
+
+    table = _half_lookup_table()
+    return [
+        table[HALF_STRUCT.unpack_from(data, offset + i * stride)[0]]
+        for i in range(count)
+    ]
 
 
 def read_half_float(data: bytes, offset: int) -> float:
     """读取半精度浮点数 (IEEE 754-2008)"""
-    try:
-        (value,) = struct.unpack_from("H", data, offset)
-
-        if value == 0:
-            return 0.0  # 零值直接返回
-
-        sign = -1 if (value & 0x8000) else 1
-        exponent = (value >> 10) & 0x1F
-        mantissa = value & 0x3FF
-
-        if exponent == 0:
-            # 非正规数或零
-            return sign * (mantissa / (2**10)) * 2**-14
-        elif exponent == 31:
-            # 无穷大或 NaN
-            return float("inf") if mantissa == 0 else float("nan")
-        else:
-            # 正规数
-            return sign * (1 + mantissa / (2**10)) * 2 ** (exponent - 15)
-
-    except struct.error as e:
-        raise ValueError(f"无法解包半精度浮点数: {e}") from e
+    return float(read_half_floats(data, offset, 1)[0])
+
+
+def read_vertex_block(
+    data: bytes, offset: int, count: int, block_size: int, uv_offset: int
+):
+    """批量读取顶点数据块
+
+    每个顶点占 block_size 字节: 0x0 处为 float32 位置, 0x0C 处为 float16 法线,
+    block_size - uv_offset 处为 float16 UV。返回 (位置, 法线, UV) 三个连续的
+    float32 数组, UV 的 V 分量已翻转; 没有 NumPy 时返回元组列表。
+    """
+    uv_start = block_size - uv_offset
+    if offset + count * block_size > len(data):
+        raise ValueError(f"顶点数据越界: {offset + count * block_size} > {len(data)}")
+
+    if np is None or block_size < 0x12 or uv_start < 0:
+        return _read_vertex_block_slow(data, offset, count, block_size, uv_start)
+
+    layout = np.dtype(
+        {
+            "names": ["position", "normal", "uv"],
+            "formats": [("<f4", 3), ("<f2", 3), ("<f2", 2)],
+            "offsets": [0x0, 0x0C, uv_start],
+            "itemsize": block_size,
+        }
+    )
+    block = np.ndarray((count,), dtype=layout, buffer=data, offset=offset)
+
+    positions = np.ascontiguousarray(block["position"], dtype=np.float32)
+    normals = _half_to_float32(block["normal"])
+    uvs = _half_to_float32(block["uv"])
+    uvs[:, 1] = 1 - uvs[:, 1]
+    return positions, normals, uvs
+
+
+def _read_vertex_block_slow(data, offset, count, block_size, uv_start):
+    """逐顶点读取 (无 NumPy 时使用)"""
+    positions, normals, uvs = [], [], []
+    for i in range(count):
+        base = offset + block_size * i
+        positions.append(struct.unpack_from("<fff", data, base))
+        normals.append(
+            (
+                read_half_float(data, base + 0x0C),
+                read_half_float(data, base + 0x0E),
+                read_half_float(data, base + 0x10),
+            )
+        )
+        u = read_half_float(data, base + uv_start)
+        v = read_half_float(data, base + uv_start + 0x2)
+        uvs.append((u, 1 - v))
+    return positions, normals, uvs
+
+
+def read_faces(data: bytes, offset: int, size: int):
+    """读取三角面索引块
+
+    每个三角面占 12 字节, 三个 uint16 索引分别位于 0x0, 0x4, 0x8。
+    以步长 12 字节直接查看数据 (不复制), 返回 (N, 3) 的索引数组;
+    没有 NumPy 时返回元组列表。末尾不足一个三角面的字节会被忽略。
+    """
+    size = max(0, min(size, len(data) - offset))
+    # 最后一个三角面只需 10 字节
+    count = (size + 2) // 12
+
+    if np is None:
+        face = struct.Struct("<H2xH2xH")
+        return [face.unpack_from(data, offset + i * 12) for i in range(count)]
+
+    return np.ndarray(
+        (count, 3), dtype="<u2", buffer=data, offset=offset, strides=(12, 4)
+    )
+
+
+HEADER_SIZE = 0x1D
+SCAN_WINDOW_MIN = 0x1000
+SCAN_WINDOW_MAX = 0x100000
+
+
+def find_header(data: bytes, start: int, block_size: int):
+    """从 start 开始查找第一个有效的网格头部偏移, 找不到返回 None
+
+    头部判定: 0x8 处顶点数量 > 0, 0x14 处贴图索引 <= 0xFF,
+    且 顶点数量 * block_size == 0x19 处的顶点字节数。
+    每次对一个窗口内的所有候选偏移同时判定, 窗口逐步增大。
+    """
+    end = len(data) - HEADER_SIZE
+    if start >= end or block_size <= 0:
+        return None
+
+    if np is None:
+        return _find_header_slow(data, start, end, block_size)
+
+    window = SCAN_WINDOW_MIN
+    while start < end:
+        count = min(window, end - start)
+        # 以 1 字节步长查看未对齐的 uint32 字段
+        fields = [
+            np.ndarray(
+                (count,), dtype="<u4", buffer=data, offset=start + field, strides=(1,)
+            )
+            for field in (0x8, 0x14, 0x19)
+        ]
+        vertex_groups, texture_index, vertex_bytes = fields
+
+        matches = (
+            (vertex_groups > 0)
+            & (vertex_groups < vertex_bytes)
+            & (texture_index <= 0xFF)
+            & (vertex_groups.astype(np.uint64) * block_size == vertex_bytes)
+        )
+        hits = np.flatnonzero(matches)
+        if hits.size:
+            return start + int(hits[0])
+
+        start += count
+        window = min(window * 2, SCAN_WINDOW_MAX)
+
+    return None
+
+
+def _find_header_slow(data, start, end, block_size):
+    """逐字节查找头部 (无 NumPy 时使用)"""
+    for offset in range(start, end):
+        vertex_groups, texture_index, vertex_bytes = (
+            struct.unpack_from("<I", data, offset + field)[0]
+            for field in (0x8, 0x14, 0x19)
+        )
+        if (
+            0 < vertex_groups < vertex_bytes
+            and texture_index <= 0xFF
+            and vertex_groups * block_size == vertex_bytes
+        ):
+            return offset
+    return None
+
+
+COLORMAP_PATTERN = b"ColorMap"
+COLORMAP_PATH_OFFSET = 0x8
+COLORMAP_DATA_OFFSET = 0xC
+
+
+def find_colormaps(data: bytes) -> list:
+    """一次扫描找出所有 ColorMap 的位置 (升序)"""
+    return [m.start() for m in re.finditer(re.escape(COLORMAP_PATTERN), data)]
+
+
+def find_colormap(positions: list, start: int, end: int = None):
+    """二分查找 [start, end) 范围内的第一个 ColorMap, 找不到返回 None"""
+    i = bisect.bisect_left(positions, start)
+    if i == len(positions):
+        return None
+    position = positions[i]
+    if end is not None and position + len(COLORMAP_PATTERN) > end:
+        return None
+    return position
+
+
+def read_colormap_path(data: bytes, position: int) -> str:
+    """读取 ColorMap 处的贴图路径"""
+    (path_length,) = struct.unpack_from("<B", data, position + COLORMAP_PATH_OFFSET)
+    path_start = position + COLORMAP_DATA_OFFSET
+    return bytes(data[path_start : path_start + path_length]).decode(
+        "utf-8", errors="replace"
+    )
@@ -24,6 +24,8 @@ class ImportPanel(bpy.types.Panel):
             ("", "import.anim", "动画 / Anim"),
             ("导入骨骼", "", "GROUP_BONE"),
             ("", "import.skel", "骨骼 / Skel"),
+            ("批量导入", "", "FILE_FOLDER"),
+            ("", "import.pde_batch", "文件夹 / Batch"),
         ]
 
         for label, operator, text in button_configs:
@@ -0,0 +1,25 @@
+"""
+在 Blender 之外以包名 pde_model_tools 导入 src 下的模块,
+并可以直接 import benchmarks 下的合成文件生成器 synthetic。
+"""
+
+import importlib.util
+import os
+import sys
+
+# 常量定义
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC = os.path.join(ROOT, "src")
+BENCHMARKS = os.path.join(ROOT, "benchmarks")
+PACKAGE = "pde_model_tools"
+
+if BENCHMARKS not in sys.path:
+    sys.path.insert(0, BENCHMARKS)
+
+if PACKAGE not in sys.modules:
+    _spec = importlib.util.spec_from_file_location(
+        PACKAGE, os.path.join(SRC, "__init__.py"), submodule_search_locations=[SRC]
+    )
+    _module = importlib.util.module_from_spec(_spec)
+    sys.modules[PACKAGE] = _module
+    _spec.loader.exec_module(_module)
@@ -0,0 +1,85 @@
+"""parse_anim_file 对合成 .anim 文件的解析结果"""
+
+import numpy as np
+import pytest
+
+from pde_model_tools import loader, tools
+from pde_model_tools.anim.utils import parse_anim_file
+
+import synthetic
+
+
+def parse(filepath: str, name: str):
+    with tools.open_buffer(filepath) as data:
+        return parse_anim_file(data, name)
+
+
+@pytest.mark.parametrize(
+    "spec",
+    [
+        synthetic.AnimSpec(groups=1, frames=1),
+        synthetic.AnimSpec(groups=8, frames=50, seed=1),
+        synthetic.AnimSpec(groups=5, frames=20, trailer=False, seed=2),
+    ],
+    ids=["single", "trailer", "no-trailer"],
+)
+def test_parse_anim_file(tmp_path, spec):
+    filepath = str(tmp_path / "walk.anim")
+    counts = synthetic.write_anim(filepath, spec)
+    expected = {}
+    synthetic.generate_anim(spec, "walk", expected)
+
+    groups = parse(filepath, "walk")
+    assert list(groups) == [synthetic.group_name(i) for i in range(spec.groups)]
+    assert list(groups) == list(expected)
+    assert sum(len(frames) for frames in groups.values()) == counts["frames"]
+    for name, frames in groups.items():
+        assert frames.dtype == np.float32 and frames.shape == (spec.frames, 7)
+        assert frames.flags.owndata
+        assert np.array_equal(frames, expected[name])
+
+
+def test_loader_anim(tmp_path):
+    spec = synthetic.AnimSpec(groups=3, frames=10)
+    filepath = str(tmp_path / "run.anim")
+    synthetic.write_anim(filepath, spec)
+    expected = {}
+    synthetic.generate_anim(spec, "run", expected)
+
+    kind, names, arrays = loader.parse_file(filepath)
+    assert kind == "anim" and names == list(expected)
+    for name in names:
+        assert np.array_equal(arrays[name], expected[name])
+
+
+def test_stops_at_invalid_group(tmp_path):
+    spec = synthetic.AnimSpec(groups=4, frames=5, trailer=False)
+    expected = {}
+    data = bytearray(synthetic.generate_anim(spec, "walk", expected))
+    # 第三个顶点组名称以数字开头
+    group_size = 4 + len(synthetic.group_name(0)) + 8 + 5 * 28
+    data[2 * group_size + 4] = ord("0")
+
+    groups = parse_anim_file(bytes(data), "walk")
+    assert list(groups) == list(expected)[:2]
+
+
+def test_match_bones_exact_and_case_insensitive():
+    from pde_model_tools.anim.utils import match_bones
+
+    matches = match_bones(["Bip01_Head", "bip01_spine", "Tail"], ["Bip01_Spine", "Bip01_Head"])
+    assert matches == {"Bip01_Head": "Bip01_Head", "bip01_spine": "Bip01_Spine"}
+
+
+def test_match_bones_one_group_per_bone():
+    from pde_model_tools.anim.utils import match_bones
+
+    # 忽略大小写时两个顶点组对应同一骨骼, 精确匹配优先, 不论顶点组顺序
+    assert match_bones(["spine", "Spine"], ["Spine"]) == {"Spine": "Spine"}
+    assert match_bones(["SPINE", "spine"], ["Spine"]) == {"SPINE": "Spine"}
+    # 骨骼名称只差大小写时各自精确匹配
+    assert match_bones(["spine", "Spine"], ["Spine", "spine"]) == {
+        "spine": "spine",
+        "Spine": "Spine",
+    }
+    assert match_bones(["a"], ["b"]) == {}
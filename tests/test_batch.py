@@ -0,0 +1,113 @@
+"""批量导入的解析进程池 (不依赖 bpy)"""
+
+import os
+import sys
+
+import pytest
+
+from pde_model_tools.batch import utils
+
+import synthetic
+
+
+@pytest.fixture
+def mesh_file(tmp_path):
+    filepath = str(tmp_path / "prop.mesh")
+    expected = synthetic.write_mesh(
+        filepath, synthetic.MeshSpec(layout="prop", chunks=3, vertices=50, faces=40)
+    )
+    return filepath, expected
+
+
+def test_package_chain():
+    chain = utils.package_chain()
+    assert [name for name, _, _ in chain] == ["pde_model_tools"]
+    assert chain[-1][2].endswith("__init__.py")
+
+
+def test_process_pool_uses_parent_package_name(mesh_file):
+    filepath, expected = mesh_file
+    # 子进程的 sys.path 中没有 src 的上级目录, 只能通过 bootstrap 登记的包名导入
+    with utils.process_pool(1) as executor:
+        parsed = executor.submit(utils.parse_file, filepath, "prop").result()
+    assert type(parsed) is utils.ParsedFile
+    assert parsed.kind == "mesh" and len(parsed.meta) == expected["chunks"]
+    with utils.attach_arrays(parsed) as arrays:
+        chunks = utils.mesh_chunks(parsed, arrays)
+        assert sum(len(chunk.positions) for chunk in chunks) == expected["vertices"]
+
+
+def test_process_pool_nested_package(mesh_file, tmp_path):
+    """Blender 扩展的包名形如 bl_ext.user_default.<插件>, 上级包在子进程中不存在"""
+    import importlib
+    import importlib.machinery
+    import importlib.util
+
+    src = os.path.dirname(os.path.dirname(os.path.abspath(utils.__file__)))
+    names = ["pmt_test_ext", "pmt_test_ext.repo"]
+    root = "pmt_test_ext.repo.pde_model_tools"
+    try:
+        for name in names:
+            spec = importlib.machinery.ModuleSpec(name, None, is_package=True)
+            spec.submodule_search_locations = [str(tmp_path)]
+            sys.modules[name] = importlib.util.module_from_spec(spec)
+        spec = importlib.util.spec_from_file_location(
+            root, os.path.join(src, "__init__.py"), submodule_search_locations=[src]
+        )
+        sys.modules[root] = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(sys.modules[root])
+        nested = importlib.import_module(f"{root}.batch.utils")
+
+        assert [name for name, _, _ in nested.package_chain()] == names + [root]
+        filepath, expected = mesh_file
+        with nested.process_pool(1) as executor:
+            parsed = executor.submit(nested.parse_file, filepath, "prop").result()
+        assert type(parsed) is nested.ParsedFile
+        assert len(parsed.meta) == expected["chunks"]
+        with nested.attach_arrays(parsed):
+            pass
+    finally:
+        for name in [n for n in sys.modules if n.split(".")[0] == names[0]]:
+            del sys.modules[name]
+
+
+def test_memory_cache_round_trip(mesh_file, tmp_path):
+    """批量导入启用内存缓存: 第一次由进程池解析并写入缓存, 第二次直接命中"""
+    from pde_model_tools.cache import MemoryCache
+    from pde_model_tools.profiler import Profiler
+
+    filepath, expected = mesh_file
+    other = str(tmp_path / "other.skel")
+    synthetic.write_skel(other, synthetic.SkelSpec(bones=4))
+    filepaths = [filepath, other]
+    memory = MemoryCache()
+
+    profile = Profiler("first")
+    assert utils.cached_results(memory, filepaths, "auto", profile) == {}
+    with utils.process_pool(2) as executor:
+        futures = [executor.submit(utils.parse_file, path, "auto") for path in filepaths]
+        for future in futures:
+            parsed = future.result()
+            profile.merge(parsed.stages)
+            with utils.attach_arrays(parsed) as arrays:
+                utils.store_result(memory, parsed, arrays, "auto", profile)
+    assert len(memory) == 2
+    assert profile.stages["cache"].calls == 4
+
+    profile = Profiler("second")
+    cached = utils.cached_results(memory, filepaths, "auto", profile)
+    assert list(cached) == filepaths
+    kind, meta, arrays = cached[filepath]
+    assert kind == "mesh" and len(meta) == expected["chunks"]
+    chunks = utils.mesh_chunks(utils.ParsedFile(filepath, kind, meta), arrays)
+    assert sum(len(chunk.positions) for chunk in chunks) == expected["vertices"]
+    assert cached[other][0] == "skel" and len(cached[other][1]) == 4
+    assert profile.stages["cache"].calls == 2
+
+
+def test_memory_cache_disabled():
+    from pde_model_tools.profiler import Profiler
+
+    profile = Profiler()
+    assert utils.cached_results(None, ["a.mesh"], "auto", profile) == {}
+    assert not profile.stages
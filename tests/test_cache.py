@@ -0,0 +1,111 @@
+"""磁盘缓存和进程内缓存 (cache.py)"""
+
+import os
+
+import numpy as np
+
+from pde_model_tools import cache, loader
+
+import synthetic
+
+
+def test_key_contains_parser_version(monkeypatch):
+    disk = cache.DiskCache("")
+    key = disk.key(b"data", "mesh", "map")
+    assert key.startswith(f"v{cache.PARSER_VERSION}-mesh-map-")
+    assert cache.ENTRY_PATTERN.match(key)
+
+    monkeypatch.setattr(cache, "PARSER_VERSION", "0" * 12)
+    changed = disk.key(b"data", "mesh", "map")
+    assert changed != key
+    assert changed.startswith("v000000000000-")
+
+
+def test_parser_version_follows_sources(tmp_path):
+    sources = ("engine.py", "skel/utils.py")
+    (tmp_path / "skel").mkdir()
+    for source in sources:
+        (tmp_path / source).write_text("# 1\n")
+    version = cache.parser_version(str(tmp_path), sources)
+    assert version == cache.parser_version(str(tmp_path), sources)
+    assert len(version) == 2 * cache.VERSION_SIZE
+
+    (tmp_path / "skel" / "utils.py").write_text("# 2\n")
+    assert cache.parser_version(str(tmp_path), sources) != version
+    assert cache.PARSER_VERSION == cache.parser_version()
+
+
+def test_parser_version_change_evicts(tmp_path, monkeypatch):
+    filepath = str(tmp_path / "body.skel")
+    synthetic.write_skel(filepath, synthetic.SkelSpec(bones=5))
+    disk = cache.DiskCache(str(tmp_path / "cache"))
+    loader.load_file(filepath, cache=disk)
+    with open(filepath, "rb") as f:
+        old_key = disk.key(f.read(), "skel")
+    assert disk.load(old_key) is not None
+
+    # 源文件变化后同一文件不再命中旧条目, 重新解析写入时删除旧条目
+    monkeypatch.setattr(cache, "PARSER_VERSION", "0" * 12)
+    with open(filepath, "rb") as f:
+        new_key = disk.key(f.read(), "skel")
+    assert new_key != old_key and disk.load(new_key) is None
+    loader.load_file(filepath, cache=disk)
+    assert [os.path.basename(entry) for _, _, entry in disk.entries()] == [new_key]
+
+
+def test_key_name():
+    disk = cache.DiskCache("")
+    assert disk.key(b"data", "anim", name="walk") != disk.key(b"data", "anim", name="run")
+    assert disk.key(b"data", "anim", name="walk") != disk.key(b"data", "anim")
+
+
+def test_anim_files_with_same_content(tmp_path):
+    # 末尾写的是 walk, 只有 walk.anim 能按文件名找到解析终点
+    data = synthetic.generate_anim(synthetic.AnimSpec(groups=3, frames=4), "walk")
+    paths = [str(tmp_path / f"{name}.anim") for name in ("walk", "run")]
+    for path in paths:
+        with open(path, "wb") as f:
+            f.write(data)
+
+    disk = cache.DiskCache(str(tmp_path / "cache"))
+    expected = [loader.parse_file(path) for path in paths]
+    for _ in range(2):  # 写入缓存, 再从缓存读取
+        for path, (kind, meta, arrays) in zip(paths, expected):
+            cached_kind, cached_meta, cached_arrays = loader.load_file(path, cache=disk)
+            assert (cached_kind, cached_meta) == (kind, meta)
+            assert list(cached_arrays) == list(arrays)
+            for name in arrays:
+                assert np.array_equal(cached_arrays[name], arrays[name])
+    assert len(disk.entries()) == 2
+
+
+def test_memory_cache_copies_mapped_arrays(tmp_path):
+    disk = cache.DiskCache(str(tmp_path / "cache"))
+    arrays = {"positions": np.arange(12, dtype=np.float32).reshape(4, 3)}
+    key = disk.key(b"test", "mesh", "map")
+    disk.store(key, "mesh", [("a", "")], arrays)
+    meta, mapped = disk.load(key)
+    assert isinstance(mapped["positions"], np.memmap)
+
+    memory = cache.MemoryCache()
+    key = ("a.mesh", "map", 0, 0)
+    memory.put(key, ("mesh", meta, mapped))
+    stored = memory.get(key)[2]["positions"]
+    assert not isinstance(stored, np.memmap)
+    assert stored.base is None and stored.flags.writeable
+    assert np.array_equal(stored, arrays["positions"])
+    assert memory.total_bytes == stored.nbytes
+
+    # 缓存不再引用缓存文件, 可以删除
+    del mapped
+    assert disk.clear() == 1
+
+
+def test_memory_cache_keeps_owned_arrays():
+    owned = np.zeros((8, 3), dtype=np.float32)
+    view = np.zeros((8, 6), dtype=np.float32)[:, :3]
+    memory = cache.MemoryCache()
+    memory.put(("a.mesh", "", 0, 0), ("mesh", [], {"owned": owned, "view": view}))
+    stored = memory.get(("a.mesh", "", 0, 0))[2]
+    assert stored["owned"] is owned
+    assert stored["view"].base is None and stored["view"].flags.c_contiguous
@@ -0,0 +1,97 @@
+"""命令行转换 (convert.py)"""
+
+import numpy as np
+
+from pde_model_tools import convert
+
+import synthetic
+
+
+def test_npz_anim_group_names_do_not_clash(tmp_path):
+    # 顶点组名称与元数据键和 savez 的参数同名
+    arrays = {
+        name: np.full((2, 7), index, dtype=np.float32)
+        for index, name in enumerate(("names", "colormaps", "kind", "file"))
+    }
+    path = str(tmp_path / "walk.npz")
+    convert.write_npz(path, "anim", list(arrays), arrays)
+
+    with np.load(path) as npz:
+        assert str(npz["meta/kind"]) == "anim"
+        assert npz["meta/names"].tolist() == list(arrays)
+        for name, array in arrays.items():
+            assert np.array_equal(npz[f"groups/{name}"], array)
+        assert sorted(npz.files) == sorted(
+            [f"groups/{name}" for name in arrays] + ["meta/kind", "meta/names"]
+        )
+
+
+def test_npz_mesh(tmp_path):
+    filepath = str(tmp_path / "prop.mesh")
+    synthetic.write_mesh(
+        filepath, synthetic.MeshSpec(layout="prop", chunks=2, vertices=20, faces=10)
+    )
+    path, _, elements, _ = convert.convert_file(filepath, str(tmp_path), "npz", "prop")
+
+    assert elements == 40
+    with np.load(path) as npz:
+        assert str(npz["meta/kind"]) == "mesh"
+        assert len(npz["meta/names"]) == len(npz["meta/colormaps"]) == 2
+        for index in range(2):
+            assert npz[f"chunk_{index}/positions"].shape == (20, 3)
+            assert npz[f"chunk_{index}/faces"].shape == (10, 3)
+
+
+def test_npz_skel(tmp_path):
+    filepath = str(tmp_path / "body.skel")
+    synthetic.write_skel(filepath, synthetic.SkelSpec(bones=5))
+    path, _, elements, _ = convert.convert_file(filepath, str(tmp_path))
+
+    assert path.endswith(".npz") and elements == 5
+    with np.load(path) as npz:
+        assert len(npz["meta/names"]) == 5
+        assert npz["bones/transforms"].shape[0] == 5
+        assert len(npz["bones/levels"]) == 5
+
+
+def test_empty_parse_fails(tmp_path, capsys):
+    empty = tmp_path / "empty.anim"
+    empty.write_bytes(b"")
+    garbage = tmp_path / "garbage.mesh"
+    garbage.write_bytes(b"\xFF" * 256)
+    good = str(tmp_path / "body.skel")
+    synthetic.write_skel(good, synthetic.SkelSpec(bones=3))
+
+    assert convert.main(["-j", "1", str(empty), str(garbage), good]) == 1
+    captured = capsys.readouterr()
+    assert captured.err.count("FAIL") == 2
+    assert "完成 1/3" in captured.out
+    assert not (tmp_path / "empty.npz").exists()
+    assert not (tmp_path / "garbage.glb").exists()
+    assert (tmp_path / "body.npz").exists()
+
+
+def test_obj_materials(tmp_path):
+    filepath = str(tmp_path / "prop.mesh")
+    spec = synthetic.MeshSpec(layout="prop", chunks=2, vertices=20, faces=10)
+    synthetic.write_mesh(filepath, spec)
+    path, _, _, _ = convert.convert_file(filepath, str(tmp_path), "obj", "prop")
+
+    lines = open(path, encoding="utf-8").read().splitlines()
+    assert lines[0] == "mtllib prop.mtl"
+    used = {line.split(" ", 1)[1] for line in lines if line.startswith("usemtl ")}
+    mtl = (tmp_path / "prop.mtl").read_text(encoding="utf-8").splitlines()
+    defined = {line.split(" ", 1)[1] for line in mtl if line.startswith("newmtl ")}
+    assert used and used == defined
+    assert f"# {synthetic.colormap_path(spec, 0)}" in mtl
+
+
+def test_obj_without_colormap(tmp_path):
+    filepath = str(tmp_path / "prop.mesh")
+    spec = synthetic.MeshSpec(layout="prop", chunks=1, vertices=4, faces=2, colormap="")
+    synthetic.write_mesh(filepath, spec)
+    path, _, _, _ = convert.convert_file(filepath, str(tmp_path), "obj", "prop")
+
+    text = open(path, encoding="utf-8").read()
+    assert "mtllib" not in text and "usemtl" not in text
+    assert not (tmp_path / "prop.mtl").exists()
@@ -0,0 +1,87 @@
+"""engine.parse_mesh 和 detect_layout 对合成文件的解析结果"""
+
+import numpy as np
+import pytest
+
+from pde_model_tools import engine
+
+import synthetic
+
+SPECS = [
+    synthetic.MeshSpec(layout="map", chunks=5, vertices=300, faces=400, seed=1),
+    synthetic.MeshSpec(layout="map", chunks=3, vertices=64, faces=0, garbage=0, seed=2),
+    synthetic.MeshSpec(layout="map", chunks=4, vertices=100, block_size=0x40, colormap=""),
+    synthetic.MeshSpec(layout="prop", chunks=5, vertices=300, faces=400, seed=3),
+    synthetic.MeshSpec(layout="prop", chunks=12, vertices=30, faces=40, seed=5),
+    synthetic.MeshSpec(layout="prop", chunks=1, vertices=1, faces=1, garbage=0),
+    synthetic.MeshSpec(layout="character", chunks=4, vertices=200, faces=300, seed=4),
+    synthetic.MeshSpec(layout="character", chunks=2, vertices=50, block_size=0x30),
+]
+
+
+def generate(spec):
+    expected = []
+    data = synthetic.generate_mesh(spec, expected)
+    return data, expected
+
+
+@pytest.mark.parametrize("spec", SPECS, ids=lambda spec: f"{spec.layout}-{spec.seed}")
+@pytest.mark.parametrize("workers", [1, 4])
+def test_parse_mesh(spec, workers):
+    data, expected = generate(spec)
+    chunks = engine.parse_mesh(data, engine.LAYOUTS[spec.layout], workers)
+
+    assert len(chunks) == len(expected)
+    for index, (chunk, values) in enumerate(zip(chunks, expected)):
+        assert chunk.block_size == spec.block_size
+        for field in ("positions", "normals", "uvs", "faces"):
+            actual = np.asarray(getattr(chunk, field))
+            assert actual.shape == values[field].shape, field
+            assert np.array_equal(actual, values[field]), field
+        # 道具取网格块之后的第一个 ColorMap, 所有贴图都写在文件末尾;
+        # 地图只在本块与下一个头部之间查找, 最后一个网格块没有贴图
+        if spec.layout == "prop":
+            assert chunk.colormap_path == synthetic.colormap_path(spec, 0)
+        elif spec.layout == "map" and index == len(expected) - 1:
+            assert chunk.colormap_path == ""
+        else:
+            assert chunk.colormap_path == values["colormap"]
+        if spec.layout == "character":
+            assert chunk.name == f"part_{index}"
+
+
+@pytest.mark.parametrize("spec", SPECS, ids=lambda spec: f"{spec.layout}-{spec.seed}")
+def test_detect_layout(spec):
+    data, _ = generate(spec)
+    # 没有无效数据的地图网格块首尾相接, 与道具无法区分, 按道具解析结果相同
+    if spec.layout == "map" and not spec.garbage and not spec.colormap:
+        pytest.skip("网格块首尾相接的地图与道具相同")
+    assert engine.detect_layout(data) is engine.LAYOUTS[spec.layout]
+
+
+def test_parse_mesh_stops_at_truncated_chunk():
+    spec = synthetic.MeshSpec(
+        layout="prop", chunks=3, vertices=40, faces=20, garbage=0, colormap=""
+    )
+    data, expected = generate(spec)
+    # 截掉最后一个网格块的面数据
+    chunks = engine.parse_mesh(data[: len(data) - 8], engine.PROP)
+    assert len(chunks) == 2
+    assert np.array_equal(chunks[1].positions, expected[1]["positions"])
+
+
+@pytest.mark.parametrize("chunks, workers, threads", [(3, 4, 0), (12, 1, 0), (12, 4, 4)])
+def test_decode_threads(monkeypatch, chunks, workers, threads):
+    # 网格块较少或 workers <= 1 时不创建线程池
+    created = []
+    executor = engine.ThreadPoolExecutor
+
+    def record(max_workers):
+        created.append(max_workers)
+        return executor(max_workers=max_workers)
+
+    monkeypatch.setattr(engine, "ThreadPoolExecutor", record)
+    spec = synthetic.MeshSpec(layout="prop", chunks=chunks, vertices=10, faces=5)
+    decoded = engine.parse_mesh(synthetic.generate_mesh(spec), engine.PROP, workers)
+    assert len(decoded) == chunks
+    assert created == ([threads] if threads else [])
@@ -0,0 +1,76 @@
+"""find_header 与逐字节查找 _find_header_slow 的一致性"""
+
+import struct
+
+import numpy as np
+import pytest
+
+from pde_model_tools import tools
+
+BLOCK_SIZES = (0x2C, 0x34, 0x40)
+
+
+def plant_header(data: bytearray, offset: int, vertices: int, block_size: int) -> None:
+    """在 offset 处写入一个有效头部"""
+    struct.pack_into("<I", data, offset + 0x8, vertices)
+    struct.pack_into("<I", data, offset + 0x14, 0)
+    struct.pack_into("<I", data, offset + 0x19, vertices * block_size)
+
+
+def random_data(rng: np.random.Generator, size: int, headers: int, block_size: int):
+    # 大量 0 字节使候选字段经常接近有效值
+    data = bytearray(
+        np.where(rng.random(size) < 0.7, 0, rng.integers(0, 0x100, size)).astype(np.uint8)
+    )
+    for _ in range(headers):
+        offset = int(rng.integers(0, size - tools.HEADER_SIZE))
+        plant_header(data, offset, int(rng.integers(1, 0x100)), block_size)
+    return bytes(data)
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_matches_slow_scan(seed):
+    rng = np.random.default_rng(seed)
+    block_size = BLOCK_SIZES[seed % len(BLOCK_SIZES)]
+    # 跨越多个扫描窗口
+    size = int(rng.integers(tools.HEADER_SIZE + 1, tools.SCAN_WINDOW_MIN * 8))
+    data = random_data(rng, size, int(rng.integers(0, 4)), block_size)
+    end = len(data) - tools.HEADER_SIZE
+
+    for start in [0, *rng.integers(0, size, 8).tolist()]:
+        expected = (
+            tools._find_header_slow(data, start, end, block_size) if start < end else None
+        )
+        assert tools.find_header(data, start, block_size) == expected
+        assert tools.find_header(memoryview(data), start, block_size) == expected
+
+
+def test_header_after_first_window():
+    block_size = 0x34
+    data = bytearray(tools.SCAN_WINDOW_MIN * 5)
+    plant_header(data, tools.SCAN_WINDOW_MIN * 3 + 7, 10, block_size)
+    data = bytes(data)
+    end = len(data) - tools.HEADER_SIZE
+    expected = tools._find_header_slow(data, 0, end, block_size)
+    assert expected is not None and expected > tools.SCAN_WINDOW_MIN * 3
+    assert tools.find_header(data, 0, block_size) == expected
+    assert tools.find_header(data, tools.SCAN_WINDOW_MIN * 3 + 8, block_size) is None
+
+
+def test_no_room_for_header():
+    assert tools.find_header(bytes(tools.HEADER_SIZE), 0, 0x34) is None
+    assert tools.find_header(bytes(0x100), 0, 0) is None
+
+
+def test_large_vertex_count_does_not_overflow():
+    # 顶点数量 * block_size 超过 uint32 时不应匹配截断后的值
+    block_size = 0x34
+    data = bytearray(0x100)
+    vertices = 0x10000000  # * 0x34 溢出 uint32
+    struct.pack_into("<I", data, 0x8, vertices)
+    struct.pack_into("<I", data, 0x19, (vertices * block_size) & 0xFFFFFFFF)
+    data = bytes(data)
+    end = len(data) - tools.HEADER_SIZE
+    assert tools.find_header(data, 0, block_size) == tools._find_header_slow(
+        data, 0, end, block_size
+    )
@@ -0,0 +1,61 @@
+"""read_half_floats 与逐个解码 _decode_half 的一致性"""
+
+import numpy as np
+import pytest
+
+from pde_model_tools import tools
+
+ALL_BITS = np.arange(0x10000, dtype="<u2").tobytes()
+
+
+def expected_values():
+    return np.array(tools._half_lookup_table(), dtype=np.float32)
+
+
+def assert_same(actual, expected):
+    actual = np.asarray(actual, dtype=np.float32)
+    assert np.array_equal(actual, expected, equal_nan=True)
+    # 区分 +0.0 和 -0.0 (NaN 的符号没有意义)
+    numbers = ~np.isnan(expected)
+    assert np.array_equal(np.signbit(actual[numbers]), np.signbit(expected[numbers]))
+
+
+def test_all_bit_patterns():
+    values = tools.read_half_floats(ALL_BITS, 0, 0x10000)
+    assert values.dtype == np.float32
+    assert_same(values, expected_values())
+
+
+def test_table_matches_decode_half():
+    table = tools._half_lookup_table()
+    for value in (0x0000, 0x0001, 0x03FF, 0x0400, 0x3C00, 0x7BFF, 0x7C00, 0xFC00, 0x8001):
+        assert table[value] == tools._decode_half(value)
+
+
+def test_strided():
+    # 每个值后有 2 字节填充
+    padded = np.zeros((0x10000, 2), dtype="<u2")
+    padded[:, 0] = np.arange(0x10000)
+    values = tools.read_half_floats(padded.tobytes(), 0, 0x10000, stride=4)
+    assert_same(values, expected_values())
+
+
+def test_offset_and_memoryview():
+    data = memoryview(b"\xAA" + ALL_BITS)
+    values = tools.read_half_floats(data, 1, 0x10000)
+    assert_same(values, expected_values())
+
+
+def test_without_numpy(monkeypatch):
+    monkeypatch.setattr(tools, "np", None)
+    values = tools.read_half_floats(ALL_BITS, 0, 0x10000)
+    assert isinstance(values, list)
+    assert_same(values, expected_values())
+
+
+def test_out_of_range():
+    with pytest.raises(ValueError):
+        tools.read_half_floats(b"\x00" * 4, 0, 3)
+    with pytest.raises(ValueError):
+        tools.read_half_floats(b"\x00" * 4, 0, 2, stride=4)
+    assert len(tools.read_half_floats(b"", 0, 0)) == 0
@@ -0,0 +1,102 @@
+"""地图分块索引 (.pmtidx) 的校验"""
+
+import os
+import struct
+
+import numpy as np
+import pytest
+
+from pde_model_tools.mesh_map import index
+from pde_model_tools.mesh_map.utils import MeshFile
+
+import synthetic
+
+
+@pytest.fixture
+def map_file(tmp_path):
+    filepath = str(tmp_path / "map.mesh")
+    spec = synthetic.MeshSpec(layout="map", chunks=4, vertices=50, faces=30)
+    expected = []
+    data = synthetic.generate_mesh(spec, expected)
+    with open(filepath, "wb") as f:
+        f.write(data)
+    # 首次读取时写入索引
+    chunks = MeshFile(filepath).read()
+    assert os.path.exists(index.index_path(filepath))
+    return filepath, data, chunks
+
+
+def rewrite(filepath: str, raw: bytes) -> None:
+    """改写索引文件, 保留网格文件的修改时间"""
+    with open(index.index_path(filepath), "wb") as f:
+        f.write(raw)
+
+
+def read_index(filepath: str) -> bytes:
+    with open(index.index_path(filepath), "rb") as f:
+        return f.read()
+
+
+def test_valid_index(map_file):
+    filepath, data, chunks = map_file
+    entries = index.load_index(filepath, data)
+    assert [e.header_offset for e in entries] == [c.header_offset for c in chunks]
+    assert [e.colormap_path for e in entries] == [c.colormap_path for c in chunks]
+    assert index.load_index(filepath) is not None
+
+
+@pytest.mark.parametrize("cut", [1, 3, index.INDEX_ENTRY.size + 1])
+def test_truncated_index(map_file, cut):
+    filepath, data, _ = map_file
+    rewrite(filepath, read_index(filepath)[:-cut])
+    assert index.load_index(filepath, data) is None
+
+
+def test_trailing_bytes(map_file):
+    filepath, data, _ = map_file
+    rewrite(filepath, read_index(filepath) + b"\x00")
+    assert index.load_index(filepath, data) is None
+
+
+def entry_offset(raw: bytes, number: int) -> int:
+    """第 number 个条目在索引文件中的位置"""
+    position = index.INDEX_HEADER.size
+    for _ in range(number):
+        path_length = index.INDEX_ENTRY.unpack_from(raw, position)[-1]
+        position += index.INDEX_ENTRY.size + path_length
+    return position
+
+
+@pytest.mark.parametrize(
+    "field, value",
+    [
+        (0, lambda size: size),  # 头部偏移超出文件
+        (5, lambda size: size - 4),  # 面起始超出文件, 与顶点块不一致
+        (6, lambda size: size),  # 面字节数超出文件
+        (2, lambda size: 0),  # 顶点数量为 0
+    ],
+)
+def test_out_of_range_entry(map_file, field, value):
+    filepath, data, _ = map_file
+    raw = bytearray(read_index(filepath))
+    position = entry_offset(raw, 2)
+    values = list(index.INDEX_ENTRY.unpack_from(raw, position))
+    values[field] = value(len(data))
+    index.INDEX_ENTRY.pack_into(raw, position, *values)
+    rewrite(filepath, bytes(raw))
+    assert index.load_index(filepath, data) is None
+    assert index.load_index(filepath) is None
+
+
+def test_invalid_index_is_rescanned(map_file):
+    filepath, data, chunks = map_file
+    raw = bytearray(read_index(filepath))
+    struct.pack_into("<Q", raw, entry_offset(raw, 1), len(data) * 2)
+    rewrite(filepath, bytes(raw))
+
+    rescanned = MeshFile(filepath).read()
+    assert len(rescanned) == len(chunks)
+    for old, new in zip(chunks, rescanned):
+        assert np.array_equal(old.positions, new.positions)
+    # 重新扫描后写入了有效的索引
+    assert index.load_index(filepath, data) is not None
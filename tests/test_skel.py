@@ -0,0 +1,144 @@
+"""parse_skel 对合成 .skel 文件的解析结果"""
+
+import numpy as np
+import pytest
+
+from pde_model_tools import loader, tools
+from pde_model_tools.skel import utils
+
+import synthetic
+
+
+@pytest.mark.parametrize(
+    "spec",
+    [
+        synthetic.SkelSpec(bones=1),
+        synthetic.SkelSpec(bones=64, seed=1),
+        synthetic.SkelSpec(bones=500, max_level=20, seed=2),
+    ],
+    ids=["root", "small", "deep"],
+)
+def test_parse_skel(tmp_path, spec):
+    filepath = str(tmp_path / "body.skel")
+    counts = synthetic.write_skel(filepath, spec)
+    expected = {}
+    synthetic.generate_skel(spec, expected)
+
+    with tools.open_buffer(filepath) as data:
+        names, levels, transforms = utils.parse_skel(data)
+    assert len(names) == counts["bones"]
+    assert names == expected["names"]
+    assert levels.dtype == np.uint32
+    assert levels.tolist() == expected["levels"]
+    assert transforms.dtype == np.float32 and transforms.shape == (spec.bones, 7)
+    assert transforms.flags.owndata
+    assert np.array_equal(transforms, expected["transforms"])
+
+
+def test_loader_skel(tmp_path):
+    spec = synthetic.SkelSpec(bones=10)
+    filepath = str(tmp_path / "body.skel")
+    synthetic.write_skel(filepath, spec)
+    expected = {}
+    synthetic.generate_skel(spec, expected)
+
+    kind, names, arrays = loader.parse_file(filepath)
+    assert kind == "skel" and names == expected["names"]
+    assert arrays["levels"].tolist() == expected["levels"]
+    assert np.array_equal(arrays["transforms"], expected["transforms"])
+
+
+def test_truncated_transforms():
+    spec = synthetic.SkelSpec(bones=6)
+    expected = {}
+    data = synthetic.generate_skel(spec, expected)
+    # 最后一个变换不完整
+    names, _, transforms = utils.parse_skel(data[:-10])
+    assert names == expected["names"]
+    assert np.array_equal(transforms, expected["transforms"][:5])
+
+
+def test_invalid_magic():
+    with pytest.raises(ValueError):
+        utils.parse_skel(b"\x00" * 64)
+
+
+def nearest_parents(heads, levels):
+    """逐个比较取最小值: 上一层级中平方距离最小, 相同时序号最小"""
+    parents = []
+    for head, level in zip(heads, levels):
+        candidates = [i for i, parent in enumerate(levels) if parent == level - 1]
+        if level <= 1 or not candidates:
+            parents.append(-1)
+            continue
+        parents.append(
+            min(
+                candidates,
+                key=lambda i: (sum((a - b) ** 2 for a, b in zip(heads[i], head)), i),
+            )
+        )
+    return parents
+
+
+class FloatKDTree:
+    """按 float32 计算距离的 KDTree 替身, 距离相同时返回序号最大的点
+
+    find_range 严格比较平方距离和半径的平方, 与 mathutils 一样可能漏掉
+    find 返回距离上的点。
+    """
+
+    def __init__(self, size):
+        self.points = []
+
+    def insert(self, co, index):
+        self.points.append((np.array(co, dtype=np.float32), index))
+
+    def balance(self):
+        pass
+
+    def distances(self, co):
+        co = np.array(co, dtype=np.float32)
+        return [(((p - co) ** 2).sum(dtype=np.float32), i) for p, i in self.points]
+
+    def find(self, co):
+        d2, index = max(self.distances(co), key=lambda item: (-item[0], item[1]))
+        return None, index, float(np.sqrt(d2))
+
+    def find_range(self, co, radius):
+        r2 = np.float32(radius) * np.float32(radius)
+        return [(None, i, None) for d2, i in self.distances(co) if d2 < r2]
+
+
+def random_skeleton(count, seed):
+    """头部坐标取整数网格, 产生大量重合和等距的头部"""
+    rng = np.random.default_rng(seed)
+    heads = rng.integers(-2, 3, size=(count, 3)).astype(np.float32) * 0.5
+    levels = rng.integers(1, 5, size=count).tolist()
+    return heads, levels
+
+
+@pytest.mark.parametrize("kdtree", [None, FloatKDTree], ids=["brute", "kdtree"])
+@pytest.mark.parametrize("seed", range(5))
+def test_find_parents(kdtree, seed):
+    heads, levels = random_skeleton(80, seed)
+    expected = nearest_parents(heads.astype(np.float64).tolist(), levels)
+    assert utils.find_parents(heads, levels, kdtree) == expected
+
+
+@pytest.mark.parametrize("kdtree", [None, FloatKDTree], ids=["brute", "kdtree"])
+def test_find_parents_coincident_heads(kdtree):
+    heads = [(0, 0, 0), (1, 0, 0), (1, 0, 0), (1, 0, 0), (0, 1, 0), (0, 0, 0)]
+    levels = [1, 2, 2, 2, 3, 3]
+    # 重合的父骨骼取序号最小的, 第一层级的骨骼为 -1
+    assert utils.find_parents(heads, levels, kdtree) == [-1, 0, 0, 0, 1, 1]
+    levels = [2, 3, 3, 1, 5, 4]
+    assert utils.find_parents(heads, levels, kdtree) == [3, 0, 0, -1, 5, 1]
+    # 上一层级没有骨骼时为 -1
+    assert utils.find_parents(heads, [1, 3, 3, 3, 1, 1], kdtree) == [-1] * 6
+
+
+def test_find_parents_batches(monkeypatch):
+    heads, levels = random_skeleton(200, 7)
+    expected = nearest_parents(heads.astype(np.float64).tolist(), levels)
+    monkeypatch.setattr(utils, "DISTANCE_BATCH", 16)
+    assert utils.find_parents(heads, levels) == expected
@@ -0,0 +1,71 @@
+"""read_vertex_block 与逐顶点 struct + _decode_half 解码的一致性"""
+
+import struct
+
+import numpy as np
+import pytest
+
+from pde_model_tools import tools
+
+
+def reference(data, offset, count, block_size, uv_offset):
+    """逐顶点解码, 与改写前的实现相同"""
+    uv_start = block_size - uv_offset
+
+    def half(position):
+        return tools._decode_half(struct.unpack_from("<H", data, position)[0])
+
+    positions, normals, uvs = [], [], []
+    for i in range(count):
+        base = offset + block_size * i
+        positions.append(struct.unpack_from("<fff", data, base))
+        normals.append((half(base + 0x0C), half(base + 0x0E), half(base + 0x10)))
+        uvs.append((half(base + uv_start), 1 - half(base + uv_start + 0x2)))
+    return [np.array(values, dtype=np.float32).reshape(-1, width)
+            for values, width in ((positions, 3), (normals, 3), (uvs, 2))]
+
+
+def assert_same(actual, expected):
+    actual = np.asarray(actual, dtype=np.float32).reshape(expected.shape)
+    assert np.array_equal(actual, expected, equal_nan=True)
+
+
+@pytest.mark.parametrize(
+    "block_size, uv_offset",
+    [
+        (0x34, 0x10),  # 地图和道具
+        (0x2C, 0x8),  # 人物&武器
+        (0x24, 0x10),
+        (0x1C, 0x8),
+        (0x10, 0x8),  # block_size < 0x12, 逐顶点读取
+        (0x11, 0x10),
+    ],
+)
+@pytest.mark.parametrize("seed", range(3))
+@pytest.mark.filterwarnings("ignore:invalid value:RuntimeWarning")
+def test_matches_reference(block_size, uv_offset, seed):
+    rng = np.random.default_rng(seed)
+    count = int(rng.integers(1, 500))
+    offset = int(rng.integers(0, 16))
+    # 随机位模式, 包含非正规数、无穷大和 NaN; 末尾留出重叠读取的空间
+    size = offset + count * block_size + 0x12
+    data = rng.integers(0, 0x100, size, dtype=np.uint8).tobytes()
+
+    expected = reference(data, offset, count, block_size, uv_offset)
+    actual = tools.read_vertex_block(data, offset, count, block_size, uv_offset)
+    for values, reference_values in zip(actual, expected):
+        assert_same(values, reference_values)
+
+
+def test_numpy_result_layout():
+    data = bytes(0x34 * 4)
+    positions, normals, uvs = tools.read_vertex_block(data, 0, 4, 0x34, 0x10)
+    for array, width in ((positions, 3), (normals, 3), (uvs, 2)):
+        assert array.dtype == np.float32 and array.shape == (4, width)
+        assert array.flags.c_contiguous and array.flags.owndata
+    assert np.all(uvs[:, 1] == 1.0)
+
+
+def test_out_of_range():
+    with pytest.raises(ValueError):
+        tools.read_vertex_block(bytes(0x34 * 2), 0, 3, 0x34, 0x10)